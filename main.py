@@ -1,6 +1,7 @@
 # FastAPI 应用入口点
 # 提供完整的 Web API 和静态文件服务
 
+import gc
 import os
 from pathlib import Path
 from fastapi import FastAPI, Request, HTTPException, Query
@@ -12,7 +13,7 @@ from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import logging
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from fastapi import UploadFile, File, Form
 
@@ -22,10 +23,10 @@ from src.reporter.security import (
     check_file_size,
     validate_file_operation,
 )
-from src.reporter.data_loader import load_data_file, prepare_analysis_data
+from src.reporter.data_loader import scan_data_file, prepare_analysis_data
 from src.reporter.analysis.basic_stats import (
     calculate_descriptive_stats,
-    analyze_missing_values,
+    build_missing_values_report,
     calculate_correlation_matrix,
 )
 from src.reporter.analysis.time_series import calculate_time_range, perform_adf_test
@@ -37,10 +38,10 @@ from src.reporter.visualization.charts import (
     create_charts_batch,
     create_charts_parallel
 )
-from src.reporter.analysis.parallel_processor import ParallelProcessor, optimize_dataframe_processing
+from src.reporter.analysis.parallel_processor import ParallelProcessor
 from src.reporter.utils.performance import PerformanceMonitor, ResourceManager, monitor_performance, optimize_polars_settings
 import asyncio
-from src.reporter.database import DatabaseManager, calculate_file_hash
+from src.reporter.database import DatabaseManager
 from src.reporter.file_manager import file_storage_manager
 
 # 配置日志
@@ -88,6 +89,15 @@ async def startup_event():
     except Exception as e:
         logger.error(f"数据库初始化失败: {e}")
         raise
+    
+    # 启动阶段创建的模块和对象常驻内存，移出 GC 跟踪以减少后续完整回收的扫描量
+    gc.freeze()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭时释放数据库连接"""
+    await db_manager.close()
 
 
 # 异常处理器
@@ -204,12 +214,10 @@ def analyze_data_file(file_path: str, filename: str) -> Dict[str, Any]:
     try:
         logger.info(f"开始分析文件: {filename}")
         
-        # 阶段1: 加载数据 (10%)
-        logger.info("阶段1: 加载数据...")
-        df = load_data_file(file_path)
-        # 优化数据框处理
-        df = optimize_dataframe_processing(df)
-        logger.info(f"数据加载完成，共{df.height}行，{df.width}列")
+        # 阶段1: 扫描数据 (10%)
+        # 只建立延迟查询，列投影、采样与流式读取在预处理阶段下推到读取器
+        logger.info("阶段1: 扫描数据...")
+        lf = scan_data_file(file_path)
         
         # 检查内存使用情况
         if not resource_manager.check_resource_availability():
@@ -218,7 +226,10 @@ def analyze_data_file(file_path: str, filename: str) -> Dict[str, Any]:
 
         # 阶段2: 准备分析数据 (20%)
         logger.info("阶段2: 准备分析数据...")
-        data_info = prepare_analysis_data(df)
+        data_info = prepare_analysis_data(lf)
+        logger.info(
+            f"数据加载完成，共{data_info['total_rows']}行，{data_info['total_columns']}列"
+        )
         
         # 获取基本信息
         time_column = data_info.get("time_column")
@@ -243,7 +254,14 @@ def analyze_data_file(file_path: str, filename: str) -> Dict[str, Any]:
 
         # 阶段4: 分析缺失值 (40%)
         logger.info("阶段4: 分析缺失值...")
-        missing_values = analyze_missing_values(processed_df)
+        # processed_df 只含时间列和有效数值列，缺失值报告取自预处理阶段对全部列的统计
+        missing_values = build_missing_values_report(
+            {
+                col: info["missing_count"]
+                for col, info in data_info.get("missing_values", {}).items()
+            },
+            data_info.get("sampled_rows", len(processed_df))
+        )
         logger.info("缺失值分析完成")
 
         # 阶段5: 计算相关性矩阵 (50%)
@@ -476,6 +494,7 @@ async def upload_and_analyze(file: UploadFile = File(...)):
     Returns:
         Dict: 分析结果
     """
+    staged_path = None
     try:
         # 验证文件类型
         if not file.filename or not is_allowed_file_type(file.filename):
@@ -488,9 +507,8 @@ async def upload_and_analyze(file: UploadFile = File(...)):
                 },
             )
 
-        # 读取文件内容
-        content = await file.read()
-        file_size = len(content)
+        # 流式写入暂存文件，同时计算哈希和大小，避免整个文件驻留内存
+        staged_path, file_hash, file_size = await file_storage_manager.stage_uploaded_stream(file.file)
 
         # 检查文件大小
         MAX_UPLOAD_SIZE = 1024 * 1024 * 1024  # 1GB
@@ -504,8 +522,6 @@ async def upload_and_analyze(file: UploadFile = File(...)):
                 },
             )
 
-        # 计算文件哈希
-        file_hash = calculate_file_hash(content)
         file_extension = Path(file.filename).suffix
         
         # 检查是否已存在相同文件
@@ -530,8 +546,8 @@ async def upload_and_analyze(file: UploadFile = File(...)):
                     return analysis_result
         
         # 新文件或需要重新分析，保存文件
-        stored_file_path = await file_storage_manager.save_uploaded_file(
-            content, file_hash, file_extension
+        stored_file_path = await file_storage_manager.commit_staged_upload(
+            staged_path, file_hash, file_extension
         )
         
         # 添加文件记录到数据库
@@ -600,9 +616,9 @@ async def upload_and_analyze(file: UploadFile = File(...)):
             analysis_result, analysis_record_id
         )
         
-        # 更新分析记录的结果文件路径
+        # 更新分析记录的结果文件路径，同时记录文件大小供存储统计汇总
         await db_manager.update_analysis_result_path(
-            analysis_record_id, str(result_file_path)
+            analysis_record_id, str(result_file_path), result_file_path.stat().st_size
         )
         
         # 添加元数据
@@ -625,6 +641,10 @@ async def upload_and_analyze(file: UploadFile = File(...)):
                 "details": None,
             },
         )
+    finally:
+        # 未提交（重复文件、校验失败或出错）的暂存文件在此清理
+        if staged_path is not None:
+            file_storage_manager.discard_staged_upload(staged_path)
 
 
 # 历史记录 API 端点
@@ -634,7 +654,9 @@ async def get_file_history(
     filter: str = Query("all", description="过滤条件"),
     limit: int = Query(20, description="返回记录数量"),
     offset: int = Query(0, description="偏移量"),
-    page: int = Query(1, description="页码")
+    page: int = Query(1, description="页码"),
+    cursor_time: Optional[str] = Query(None, description="游标分页：上一页最后一条的上传时间"),
+    cursor_id: Optional[int] = Query(None, description="游标分页：上一页最后一条的ID")
 ):
     """获取文件上传历史记录"""
     try:
@@ -647,8 +669,14 @@ async def get_file_history(
         if page > 1:
             offset = (page - 1) * limit
         
-        history = await db_manager.get_file_history(limit, offset, file_type)
+        # 提供游标时使用 keyset 分页，深翻页无需跳过前面的记录
+        cursor = (cursor_time, cursor_id) if cursor_time is not None and cursor_id is not None else None
+        history = await db_manager.get_file_history(limit, offset, file_type, cursor)
         has_more = len(history) == limit
+        next_cursor = (
+            {"cursor_time": history[-1]["upload_time"], "cursor_id": history[-1]["id"]}
+            if has_more else None
+        )
         
         return {
             "success": True,
@@ -663,7 +691,8 @@ async def get_file_history(
                     "created_at": record["upload_time"],
                     "status": "completed"  # 简化状态
                 } for record in history],
-                "has_more": has_more
+                "has_more": has_more,
+                "next_cursor": next_cursor
             }
         }
     except Exception as e:
@@ -951,7 +980,9 @@ async def get_storage_stats():
         Dict: 存储统计信息
     """
     try:
-        stats = file_storage_manager.get_storage_stats()
+        # 上传文件的统计由数据库聚合得到，避免每次请求遍历整个上传目录
+        file_stats = await db_manager.get_file_stats()
+        stats = await file_storage_manager.get_storage_stats(file_stats)
         
         return {
             "success": True,
@@ -29,17 +29,18 @@ async def init_database():
     try:
         logger.info("开始初始化数据库...")
         
-        # 创建数据库管理器实例
-        db_manager = DatabaseManager()
-        
-        # 初始化数据库
-        await db_manager.init_database()
-        
-        logger.info("数据库初始化完成")
-        
-        # 显示存储统计信息
-        stats = file_storage_manager.get_storage_stats()
-        logger.info(f"存储统计信息: {stats}")
+        # 创建数据库管理器实例（退出时关闭连接，否则进程无法结束）
+        async with DatabaseManager() as db_manager:
+            # 初始化数据库
+            await db_manager.init_database()
+            
+            logger.info("数据库初始化完成")
+            
+            # 显示存储统计信息
+            stats = await file_storage_manager.get_storage_stats(
+                await db_manager.get_file_stats()
+            )
+            logger.info(f"存储统计信息: {stats}")
         
         return True
         
@@ -53,17 +54,16 @@ async def reset_database():
     try:
         logger.warning("开始重置数据库...")
         
-        # 创建数据库管理器实例
-        db_manager = DatabaseManager()
-        
-        # 删除数据库文件
-        db_path = Path("data/database/data_report.db")
-        if db_path.exists():
-            db_path.unlink()
-            logger.info(f"删除数据库文件: {db_path}")
-        
-        # 重新初始化
-        await db_manager.init_database()
+        # 创建数据库管理器实例（退出时关闭连接，否则进程无法结束）
+        async with DatabaseManager() as db_manager:
+            # 删除数据库文件
+            db_path = Path("data/database/data_report.db")
+            if db_path.exists():
+                db_path.unlink()
+                logger.info(f"删除数据库文件: {db_path}")
+            
+            # 重新初始化
+            await db_manager.init_database()
         
         logger.info("数据库重置完成")
         return True
@@ -78,8 +78,6 @@ async def check_database():
     try:
         logger.info("检查数据库状态...")
         
-        db_manager = DatabaseManager()
-        
         # 检查数据库文件是否存在
         db_path = Path("data/database/data_report.db")
         if not db_path.exists():
@@ -87,15 +85,18 @@ async def check_database():
             return False
         
         # 尝试连接数据库
-        await db_manager.init_database()
-        
-        # 获取统计信息
-        # 这里可以添加更多的检查逻辑
-        logger.info("数据库状态正常")
-        
-        # 显示存储统计
-        stats = file_storage_manager.get_storage_stats()
-        logger.info(f"存储统计: {stats}")
+        async with DatabaseManager() as db_manager:
+            await db_manager.init_database()
+            
+            # 获取统计信息
+            # 这里可以添加更多的检查逻辑
+            logger.info("数据库状态正常")
+            
+            # 显示存储统计
+            stats = await file_storage_manager.get_storage_stats(
+                await db_manager.get_file_stats()
+            )
+            logger.info(f"存储统计: {stats}")
         
         return True
         
@@ -10,11 +10,11 @@
 
 import polars as pl
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union
 from scipy import stats
 import logging
 from ..utils.performance import monitor_performance
-from .parallel_processor import parallel_column_processing, optimize_dataframe_processing
+from .parallel_processor import optimize_dataframe_processing
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -22,13 +22,15 @@ logger = logging.getLogger(__name__)
 
 @monitor_performance
 def calculate_descriptive_stats(
-    df: pl.DataFrame, columns: List[str]
+    df: Union[pl.DataFrame, pl.LazyFrame], columns: List[str]
 ) -> Dict[str, Dict[str, float]]:
     """
-    计算描述性统计量（优化版本，支持并行处理）
+    计算描述性统计量（单个 Polars 查询，由 Polars 线程池并行执行）
+
+    传入 LazyFrame（如文件扫描）时以流式引擎执行，无需将整个文件载入内存。
 
     Args:
-        df: 数据框
+        df: 数据框或延迟数据框
         columns: 要分析的列名列表
 
     Returns:
@@ -38,85 +40,67 @@ def calculate_descriptive_stats(
         logger.warning("没有提供列名")
         return {}
     
-    # 优化数据框处理
-    optimized_df = optimize_dataframe_processing(df)
-    
     # 过滤有效列
-    valid_columns = [col for col in columns if col in optimized_df.columns]
+    schema = df.collect_schema()
+    valid_columns = [col for col in columns if col in schema]
     if not valid_columns:
         logger.warning("没有有效的列")
         return {}
     
-    logger.info(f"开始计算 {len(valid_columns)} 列的描述性统计")
+    numeric_columns = []
+    for col in valid_columns:
+        if schema[col].is_numeric():
+            numeric_columns.append(col)
+        else:
+            logger.warning(f"列 '{col}' 不是数值类型，跳过")
+    if not numeric_columns:
+        return {}
     
-    def calculate_single_column_stats(col_series: pl.Series) -> Dict[str, float]:
-        """
-        计算单列的描述性统计
-        
-        Args:
-            col_series: 列数据
-            
-        Returns:
-            统计结果字典
-        """
-        try:
-            # 去除空值
-            col_data = col_series.drop_nulls()
-            if len(col_data) == 0:
-                return {}
-            
-            # 转换为numpy数组进行计算
-            values = col_data.to_numpy()
-            
-            # 检查数据类型
-            if not np.issubdtype(values.dtype, np.number):
-                logger.warning(f"列 '{col_series.name}' 不是数值类型，跳过")
-                return {}
-            
-            # 计算统计量
-            result = {
-                "count": len(values),
-                "mean": float(np.mean(values)),
-                "median": float(np.median(values)),
-                "std": float(np.std(values, ddof=1)) if len(values) > 1 else 0.0,
-                "min": float(np.min(values)),
-                "max": float(np.max(values)),
-                "q1": float(np.percentile(values, 25)),
-                "q3": float(np.percentile(values, 75)),
-            }
-            
-            # 计算偏度和峰度（需要足够的数据点）
-            if len(values) >= 3:
-                result["skewness"] = float(stats.skew(values))
-                result["kurtosis"] = float(stats.kurtosis(values))
-            else:
-                result["skewness"] = 0.0
-                result["kurtosis"] = 0.0
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"计算列统计失败: {e}")
-            return {}
+    logger.info(f"开始计算 {len(numeric_columns)} 列的描述性统计")
     
-    # 根据列数决定是否使用并行处理
-    if len(valid_columns) <= 2:
-        # 少量列，直接顺序处理
-        stats_dict = {}
-        for col in valid_columns:
-            col_stats = calculate_single_column_stats(optimized_df[col])
-            if col_stats:
-                stats_dict[col] = col_stats
-    else:
-        # 多列，使用并行处理
-        stats_dict = parallel_column_processing(
-            optimized_df, 
-            valid_columns, 
-            calculate_single_column_stats,
-            max_workers=min(4, len(valid_columns))
+    # 每列一个 struct，所有列的统计量在一次 select 中算完（空值自动忽略）
+    exprs = []
+    for col in numeric_columns:
+        c = pl.col(col)
+        exprs.append(
+            pl.struct(
+                c.count().alias("count"),
+                c.mean().alias("mean"),
+                c.median().alias("median"),
+                c.std(ddof=1).alias("std"),
+                c.min().cast(pl.Float64).alias("min"),
+                c.max().cast(pl.Float64).alias("max"),
+                c.quantile(0.25, interpolation="linear").alias("q1"),
+                c.quantile(0.75, interpolation="linear").alias("q3"),
+                c.skew().alias("skewness"),
+                c.kurtosis().alias("kurtosis"),
+            ).alias(col)
         )
-        # 过滤空结果
-        stats_dict = {k: v for k, v in stats_dict.items() if v}
+    
+    try:
+        if isinstance(df, pl.LazyFrame):
+            result_df = df.select(exprs).collect(engine="streaming")
+        else:
+            result_df = df.select(exprs)
+        row = result_df.row(0, named=True)
+    except Exception as e:
+        logger.error(f"计算列统计失败: {e}")
+        return {}
+    
+    stats_dict = {}
+    for col in numeric_columns:
+        col_stats = row[col]
+        count = col_stats["count"]
+        if not count:
+            continue
+        
+        # 与原 numpy 实现保持一致：单值时标准差为 0，少于 3 个点时偏度、峰度为 0
+        if count < 2:
+            col_stats["std"] = 0.0
+        if count < 3:
+            col_stats["skewness"] = 0.0
+            col_stats["kurtosis"] = 0.0
+        stats_dict[col] = col_stats
     
     logger.info(f"描述性统计计算完成，处理了 {len(stats_dict)} 列")
     return stats_dict
@@ -129,14 +113,32 @@ def analyze_missing_values(df: pl.DataFrame) -> Dict[str, Dict[str, int]]:
     Args:
         df: 数据框
 
+    Returns:
+        Dict[str, Dict[str, int]]: 各列的缺失值统计
+    """
+    null_counts = df.null_count().row(0, named=True) if df.width else {}
+    return build_missing_values_report(null_counts, len(df))
+
+
+def build_missing_values_report(
+    null_counts: Dict[str, int], total_rows: int
+) -> Dict[str, Dict[str, int]]:
+    """
+    由各列缺失值计数生成缺失值统计
+
+    prepare_analysis_data 已在全部列上统计过缺失值（其 processed_df 只保留
+    时间列和数值列），调用方可直接用这些计数生成报告，无需再扫描数据。
+
+    Args:
+        null_counts: 列名到缺失值个数的映射
+        total_rows: 统计所基于的行数
+
     Returns:
         Dict[str, Dict[str, int]]: 各列的缺失值统计
     """
     missing_stats = {}
-    total_rows = len(df)
 
-    for col in df.columns:
-        null_count = df[col].null_count()
+    for col, null_count in null_counts.items():
         non_null_count = total_rows - null_count
 
         missing_stats[col] = {
@@ -1,13 +1,58 @@
 import os
-import json
+import re
 import yaml
 from pathlib import Path
-from typing import Dict, Any, Union
+from typing import Dict, Any, Tuple, Union
 import logging
 from dataclasses import dataclass, field
 
+from ..utils import json_utils
+
+# 优先使用 libyaml 的 C 实现解析 YAML，不可用时回退到纯 Python 解析器
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 logger = logging.getLogger(__name__)
 
+# 环境变量值类型分类正则
+_BOOL_RE = re.compile(r'(?:true|false)', re.IGNORECASE)
+_INT_RE = re.compile(r'[+-]?\d+')
+_FLOAT_RE = re.compile(r'[+-]?(?:\d+\.\d*|\.\d+)(?:[eE][+-]?\d+)?')
+
+# 环境变量到配置路径的映射，键路径在模块加载时预先拆分，所有实例共享
+_ENV_MAPPINGS: Tuple[Tuple[str, str, Tuple[str, ...]], ...] = tuple(
+    (env_var, config_path, tuple(config_path.split('.')))
+    for env_var, config_path in {
+        # 数据处理
+        "DATA_CHUNK_SIZE_MB": "data_processing.chunk_size_mb",
+        "MAX_MEMORY_MB": "data_processing.max_memory_usage_mb",
+        "PARALLEL_WORKERS": "data_processing.parallel_workers",
+        "ENABLE_CACHING": "data_processing.enable_caching",
+        "CACHE_DIR": "data_processing.cache_dir",
+        "TEMP_DIR": "data_processing.temp_dir",
+
+        # 分析
+        "CORRELATION_THRESHOLD": "analysis.correlation_threshold",
+        "SIGNIFICANCE_LEVEL": "analysis.significance_level",
+        "SAMPLE_SIZE_THRESHOLD": "analysis.sample_size_threshold",
+
+        # 输出
+        "OUTPUT_FORMAT": "output.format",
+        "OUTPUT_DIR": "output.output_dir",
+        "CHART_FORMAT": "output.chart_format",
+
+        # 性能
+        "ENABLE_PROFILING": "performance.enable_profiling",
+        "MAX_EXECUTION_TIME": "performance.max_execution_time",
+
+        # 日志
+        "LOG_LEVEL": "logging.level",
+        "LOG_FILE": "logging.file"
+    }.items()
+)
+
 @dataclass
 class ConfigManager:
     """配置管理器
@@ -97,97 +142,78 @@ class ConfigManager:
     
     def _load_environment_config(self) -> None:
         """加载环境特定配置文件"""
-        config_files = [
-            self.config_dir / "config.json",
-            self.config_dir / "config.yaml",
-            self.config_dir / "config.yml",
-            self.config_dir / f"config.{self.environment}.json",
-            self.config_dir / f"config.{self.environment}.yaml",
-            self.config_dir / f"config.{self.environment}.yml"
-        ]
+        # 候选文件名 -> 加载顺序（后加载的覆盖先加载的）
+        wanted = {
+            "config.json": 0,
+            "config.yaml": 1,
+            "config.yml": 2,
+            f"config.{self.environment}.json": 3,
+            f"config.{self.environment}.yaml": 4,
+            f"config.{self.environment}.yml": 5
+        }
         
-        for config_file in config_files:
-            if config_file.exists():
-                try:
-                    config_data = self._load_config_file(config_file)
-                    self._merge_config(config_data)
-                    self._config_files[config_file.name] = config_file
-                    logger.info(f"配置文件已加载: {config_file}")
-                except Exception as e:
-                    logger.error(f"加载配置文件失败 {config_file}: {e}")
+        # 一次 scandir 列出目录，代替逐个候选文件 exists() 检查
+        try:
+            with os.scandir(self.config_dir) as it:
+                found = sorted(
+                    (entry.name for entry in it if entry.name in wanted),
+                    key=wanted.__getitem__
+                )
+        except OSError:
+            found = []
+        
+        for name in found:
+            config_file = self.config_dir / name
+            try:
+                config_data = self._load_config_file(config_file)
+                self._merge_config(config_data)
+                self._config_files[config_file.name] = config_file
+                logger.info(f"配置文件已加载: {config_file}")
+            except Exception as e:
+                logger.error(f"加载配置文件失败 {config_file}: {e}")
     
     def _load_config_file(self, file_path: Path) -> Dict[str, Any]:
         """加载配置文件"""
         with open(file_path, 'r', encoding='utf-8') as f:
             if file_path.suffix.lower() == '.json':
-                return json.load(f)
+                return json_utils.loads(f.read())
             elif file_path.suffix.lower() in ['.yaml', '.yml']:
-                return yaml.safe_load(f) or {}
+                return yaml.load(f, Loader=_YamlLoader) or {}
             else:
                 raise ValueError(f"不支持的配置文件格式: {file_path.suffix}")
     
     def _load_env_variables(self) -> None:
         """从环境变量加载配置"""
-        env_mappings = {
-            # 数据处理
-            "DATA_CHUNK_SIZE_MB": "data_processing.chunk_size_mb",
-            "MAX_MEMORY_MB": "data_processing.max_memory_usage_mb",
-            "PARALLEL_WORKERS": "data_processing.parallel_workers",
-            "ENABLE_CACHING": "data_processing.enable_caching",
-            "CACHE_DIR": "data_processing.cache_dir",
-            "TEMP_DIR": "data_processing.temp_dir",
-            
-            # 分析
-            "CORRELATION_THRESHOLD": "analysis.correlation_threshold",
-            "SIGNIFICANCE_LEVEL": "analysis.significance_level",
-            "SAMPLE_SIZE_THRESHOLD": "analysis.sample_size_threshold",
-            
-            # 输出
-            "OUTPUT_FORMAT": "output.format",
-            "OUTPUT_DIR": "output.output_dir",
-            "CHART_FORMAT": "output.chart_format",
-            
-            # 性能
-            "ENABLE_PROFILING": "performance.enable_profiling",
-            "MAX_EXECUTION_TIME": "performance.max_execution_time",
-            
-            # 日志
-            "LOG_LEVEL": "logging.level",
-            "LOG_FILE": "logging.file"
-        }
-        
-        for env_var, config_path in env_mappings.items():
+        for env_var, config_path, config_keys in _ENV_MAPPINGS:
             env_value = os.getenv(env_var)
             if env_value is not None:
                 try:
                     # 类型转换
                     converted_value = self._convert_env_value(env_value, config_path)
-                    self._set_nested_config(config_path, converted_value)
+                    self._set_nested_config_tuple(config_keys, converted_value)
                     logger.debug(f"环境变量已加载: {env_var} -> {config_path}")
                 except Exception as e:
                     logger.warning(f"环境变量转换失败 {env_var}: {e}")
     
     def _convert_env_value(self, value: str, config_path: str) -> Any:
         """转换环境变量值到适当的类型"""
-        # 布尔值转换
-        if value.lower() in ['true', 'false']:
-            return value.lower() == 'true'
-        
-        # 数字转换
-        try:
-            if '.' in value:
-                return float(value)
-            else:
-                return int(value)
-        except ValueError:
-            pass
+        # 用预编译正则分类，避免 lower() 分配和 ValueError 回退
+        if _BOOL_RE.fullmatch(value):
+            return value[0] in 'tT'
+        if _INT_RE.fullmatch(value):
+            return int(value)
+        if _FLOAT_RE.fullmatch(value):
+            return float(value)
         
         # 字符串值
         return value
     
     def _set_nested_config(self, path: str, value: Any) -> None:
         """设置嵌套配置值"""
-        keys = path.split('.')
+        self._set_nested_config_tuple(tuple(path.split('.')), value)
+
+    def _set_nested_config_tuple(self, keys: Tuple[str, ...], value: Any) -> None:
+        """按预先拆分的键路径设置嵌套配置值"""
         config = self._config
         
         for key in keys[:-1]:
@@ -318,7 +344,7 @@ class ConfigManager:
         
         with open(file_path, 'w', encoding='utf-8') as f:
             if format.lower() == 'json':
-                json.dump(self._config, f, indent=2, ensure_ascii=False)
+                f.write(json_utils.dumps(self._config, indent=True).decode('utf-8'))
             elif format.lower() in ['yaml', 'yml']:
                 yaml.dump(self._config, f, default_flow_style=False, allow_unicode=True)
             else:
@@ -2,6 +2,11 @@ from typing import Optional, Dict, Any
 from dataclasses import dataclass
 from .config_manager import config_manager
 
+# 枚举类配置项的合法取值
+_OUTPUT_FORMATS = frozenset({'json', 'yaml', 'csv', 'excel'})
+_CHART_FORMATS = frozenset({'png', 'jpg', 'svg', 'pdf'})
+_LOG_LEVELS = frozenset({'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'})
+
 @dataclass
 class DataProcessingSettings:
     """数据处理设置"""
@@ -172,6 +177,16 @@ class Settings:
             设置是否有效
         """
         try:
+            # 先做枚举值的集合成员检查：开销最小，且最常因配置笔误失败
+            if self.output.format not in _OUTPUT_FORMATS:
+                return False
+            if self.output.chart_format not in _CHART_FORMATS:
+                return False
+            if self.logging.level not in _LOG_LEVELS:
+                return False
+            if self.database.enabled and not self.database.url:
+                return False
+            
             # 验证数据处理设置
             if self.data_processing.chunk_size_mb <= 0:
                 return False
@@ -190,12 +205,6 @@ class Settings:
             if self.analysis.sample_size_threshold <= 0:
                 return False
             
-            # 验证输出设置
-            if self.output.format not in ['json', 'yaml', 'csv', 'excel']:
-                return False
-            if self.output.chart_format not in ['png', 'jpg', 'svg', 'pdf']:
-                return False
-            
             # 验证性能设置
             if not (0 < self.performance.gc_threshold <= 1):
                 return False
@@ -205,16 +214,12 @@ class Settings:
                 return False
             
             # 验证日志设置
-            if self.logging.level not in ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']:
-                return False
             if self.logging.max_size_mb <= 0:
                 return False
             if self.logging.backup_count < 0:
                 return False
             
             # 验证数据库设置
-            if self.database.enabled and not self.database.url:
-                return False
             if self.database.pool_size <= 0:
                 return False
             if self.database.timeout <= 0:
@@ -226,14 +231,14 @@ class Settings:
             return False
     
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
+        """转换为字典，各配置段均为副本，修改结果不会影响配置"""
         return {
-            'data_processing': self.data_processing.__dict__,
-            'analysis': self.analysis.__dict__,
-            'output': self.output.__dict__,
-            'performance': self.performance.__dict__,
-            'logging': self.logging.__dict__,
-            'database': self.database.__dict__
+            'data_processing': dict(self.data_processing.__dict__),
+            'analysis': dict(self.analysis.__dict__),
+            'output': dict(self.output.__dict__),
+            'performance': dict(self.performance.__dict__),
+            'logging': dict(self.logging.__dict__),
+            'database': dict(self.database.__dict__)
         }
 
 # 全局设置实例
@@ -10,16 +10,244 @@
 """
 
 import polars as pl
+import polars.selectors as cs
+import os
 import re
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple, Union
 from pathlib import Path
 import logging
 
+from .config import config_manager
+
+
+# 读取策略的文件大小阈值
+_CSV_ROW_LIMIT_BYTES = 50 * 1024 * 1024  # CSV 超过 50MB 时限制读取行数
+_LARGE_FILE_BYTES = 1024 * 1024 * 1024  # 超过 1GB 视为大文件（Parquet 限制行数并告警）
+
+# 可直接作为时间列的日期时间类型（含任意精度、时区的 Datetime）
+_TEMPORAL_DTYPES = (pl.Datetime, pl.Date)
+
+# 常见时间格式（按优先级排列），用于单次合并解析
+_TIME_FORMATS = (
+    "%Y-%m-%d %H:%M:%S%.f",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S%.f",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d",
+    "%Y/%m/%d %H:%M:%S",
+    "%Y/%m/%d",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y",
+)
+
+
+# 探测时间格式时使用的样本数量
+_FORMAT_PROBE_SIZE = 256
+
+# 时间列名称模式（合并为单个预编译正则）
+_TIME_NAME_RE = re.compile(
+    r"datetime|date|time|timestamp|tagtime|日期|时间|年月日|年月|年月日时分秒"
+)
+
+# 标准日期时间取值模式：YYYY-MM-DD[ HH:MM:SS]、MM/DD/YYYY
+_DATE_VALUE_RE = re.compile(r"\d{4}-\d{2}-\d{2}(?: \d{2}:\d{2}:\d{2})?|\d{2}/\d{2}/\d{4}")
+
+
+def _sniff_time_formats(values: pl.Series) -> List[str]:
+    """
+    在少量样本上探测时间列的格式
+
+    只对前若干个非空值尝试全部候选格式（单次 select）：若某个格式能解析全部样本则
+    直接选用；否则（样本中格式混杂）返回所有命中过的格式，按命中数
+    从高到低排列，命中数相同时保持候选顺序。
+
+    Args:
+        values: 字符串类型的时间列
+
+    Returns:
+        List[str]: 用于整列解析的格式列表，为空表示没有可用格式
+    """
+    probe = values.drop_nulls().head(_FORMAT_PROBE_SIZE).str.strip_chars()
+    probe_size = probe.len()
+    if probe_size == 0:
+        return []
+
+    # 一次 select 统计所有候选格式在样本上成功解析的个数
+    parsed_counts = probe.to_frame("value").select(
+        pl.col("value").str.to_datetime(fmt, strict=False, time_unit="us").count().alias(fmt)
+        for fmt in _TIME_FORMATS
+    ).row(0)
+
+    hits = []
+    for fmt, parsed in zip(_TIME_FORMATS, parsed_counts):
+        if parsed == probe_size:
+            return [fmt]
+        if parsed > 0:
+            hits.append((parsed, fmt))
+
+    hits.sort(key=lambda item: -item[0])
+    return [fmt for _, fmt in hits]
+
+
+def _build_datetime_expr(column: str, formats: List[str], cache: bool = True) -> pl.Expr:
+    """
+    构建时间列解析表达式
+
+    去除首尾空格后按给定格式做非严格解析；只有一个格式时整列只解析
+    一次，多个格式时用 coalesce 取每行第一个成功的结果。
+    始终传入显式格式：Polars 对 ISO-8601 等常见格式串有专用快速解析，
+    而 format=None 的自动推断路径要慢一个数量级。
+
+    Args:
+        column: 时间列名
+        formats: 由 _sniff_time_formats 选出的格式列表（非空）
+        cache: 是否启用 Polars 的解析缓存（仅在取值大量重复时有益）
+
+    Returns:
+        pl.Expr: 解析为 Datetime 的表达式
+    """
+    stripped = pl.col(column).str.strip_chars()
+    parsers = [
+        stripped.str.to_datetime(fmt, strict=False, time_unit="us", cache=cache)
+        for fmt in formats
+    ]
+    if len(parsers) == 1:
+        return parsers[0].alias(column)
+    return pl.coalesce(parsers).alias(column)
+
+
+def _stat_data_file(file_path: str) -> Tuple[Path, os.stat_result]:
+    """
+    获取数据文件的状态信息（只调用一次 stat）
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        Tuple[Path, os.stat_result]: 路径对象与 stat 结果
+
+    Raises:
+        FileNotFoundError: 文件不存在
+    """
+    file_path_obj = Path(file_path)
+    try:
+        return file_path_obj, file_path_obj.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"文件不存在: {file_path}")
+
+
+def _row_limit(suffix: str, file_size: int, max_rows: int) -> Optional[int]:
+    """按文件类型和大小决定读取行数上限：CSV 50MB以上、Parquet 1GB以上才限制"""
+    threshold = _CSV_ROW_LIMIT_BYTES if suffix == ".csv" else _LARGE_FILE_BYTES
+    return max_rows if file_size > threshold else None
+
+
+def _scan_data_file(file_path: str, suffix: str, file_size: int, max_rows: int) -> pl.LazyFrame:
+    """
+    构建 CSV 或 Parquet 文件的延迟扫描
+
+    Args:
+        file_path: 文件路径
+        suffix: 小写文件扩展名
+        file_size: 文件大小（字节）
+        max_rows: 最大行数限制
+
+    Returns:
+        pl.LazyFrame: 延迟扫描的数据框
+    """
+    n_rows = _row_limit(suffix, file_size, max_rows)
+    if suffix == ".csv":
+        # 注意：禁用自动日期解析，因为可能会错误地处理带前导空格的时间格式
+        # 时间列的转换将在 prepare_analysis_data 函数中处理
+        return pl.scan_csv(
+            file_path,
+            low_memory=True,
+            n_rows=n_rows,
+            ignore_errors=True,
+            try_parse_dates=False,
+            rechunk=False
+        )
+    elif suffix == ".parquet":
+        return pl.scan_parquet(file_path, parallel="auto", low_memory=True, n_rows=n_rows)
+    else:
+        raise ValueError(f"不支持的文件格式: {suffix}")
+
+
+@lru_cache(maxsize=8)
+def _read_data_file(
+    file_path: str, suffix: str, file_size: int, mtime_ns: int, max_rows: int
+) -> pl.DataFrame:
+    """
+    读取 CSV 或 Parquet 文件（按路径、大小、修改时间缓存）
+
+    文件内容变化时 mtime_ns/file_size 随之变化，缓存自然失效；
+    返回的数据框在后续处理中只读使用，可安全复用。
+
+    Args:
+        file_path: 文件路径
+        suffix: 小写文件扩展名
+        file_size: 文件大小（字节）
+        mtime_ns: 文件修改时间（纳秒），仅用作缓存键
+        max_rows: 最大行数限制
+
+    Returns:
+        pl.DataFrame: 加载的数据框
+    """
+    # 根据文件大小一次性选定读取策略
+    chunk_size_mb = config_manager.get('data_processing.chunk_size_mb', 100)
+    if file_size > chunk_size_mb * 1024 * 1024:
+        # 超过分块阈值的大文件：延迟扫描 + 流式引擎分批解析，降低峰值内存
+        return _scan_data_file(file_path, suffix, file_size, max_rows).collect(engine="streaming")
+
+    n_rows = _row_limit(suffix, file_size, max_rows)
+    if suffix == ".csv":
+        return pl.read_csv(
+            file_path,
+            n_rows=n_rows,
+            ignore_errors=True,
+            try_parse_dates=False,  # 禁用自动日期解析
+            rechunk=False  # 保留并行解析产生的分块，省去合并拷贝
+        )
+    elif suffix == ".parquet":
+        # 使用 Polars 原生读取器按行组/列块并行解码，不再经由 PyArrow 中转
+        return pl.read_parquet(file_path, parallel="auto", n_rows=n_rows)
+    else:
+        raise ValueError(f"不支持的文件格式: {suffix}")
+
+
+def scan_data_file(file_path: str, max_rows: int = 1000000) -> pl.LazyFrame:
+    """
+    延迟扫描 CSV 或 Parquet 文件，返回 LazyFrame
+
+    与 load_data_file 不同，这里不会读取任何数据行：后续的列投影、
+    行数限制等操作会被下推到读取器，只解析真正用到的部分。
+
+    Args:
+        file_path: 文件路径
+        max_rows: 最大行数限制（默认100万行）
+
+    Returns:
+        pl.LazyFrame: 延迟扫描的数据框
+
+    Raises:
+        ValueError: 不支持的文件格式
+        FileNotFoundError: 文件不存在
+    """
+    file_path_obj, file_stat = _stat_data_file(file_path)
+    return _scan_data_file(
+        file_path, file_path_obj.suffix.lower(), file_stat.st_size, max_rows
+    )
+
 
 def load_data_file(file_path: str, max_rows: int = 1000000) -> pl.DataFrame:
     """
     加载 CSV 或 Parquet 文件，支持大数据集优化
 
+    同一文件在未修改的情况下重复加载时直接返回缓存结果。
+
     Args:
         file_path: 文件路径
         max_rows: 最大行数限制（默认100万行）
@@ -31,48 +259,26 @@ def load_data_file(file_path: str, max_rows: int = 1000000) -> pl.DataFrame:
         ValueError: 不支持的文件格式或数据过大
         FileNotFoundError: 文件不存在
     """
-    file_path_obj = Path(file_path)
-
-    if not file_path_obj.exists():
-        raise FileNotFoundError(f"文件不存在: {file_path}")
-
-    file_size = file_path_obj.stat().st_size
+    file_path_obj, file_stat = _stat_data_file(file_path)
+    file_size = file_stat.st_size
     
     # 大文件警告
-    if file_size > 1024 * 1024 * 1024:  # 1GB
+    if file_size > _LARGE_FILE_BYTES:
         logging.warning(f"处理大文件: {file_size / 1024 / 1024:.1f}MB")
 
     suffix = file_path_obj.suffix.lower()
 
     try:
-        if suffix == ".csv":
-            # 使用流式读取处理大文件
-            # 注意：禁用自动日期解析，因为可能会错误地处理带前导空格的时间格式
-            # 时间列的转换将在 prepare_analysis_data 函数中处理
-            return pl.read_csv(
-                file_path,
-                low_memory=True,
-                n_rows=max_rows if file_size > 50 * 1024 * 1024 else None,  # 50MB以上限制行数
-                ignore_errors=True,
-                try_parse_dates=False  # 禁用自动日期解析
-            )
-        elif suffix == ".parquet":
-            # Parquet文件通常更高效，使用内存映射
-            return pl.read_parquet(
-                file_path,
-                use_pyarrow=True,
-                memory_map=True,
-                n_rows=max_rows if file_size > 1024 * 1024 * 1024 else None  # 1GB以上限制行数
-            )
-        else:
-            raise ValueError(f"不支持的文件格式: {suffix}")
-    
+        # 以解析后的绝对路径作为缓存键，相对路径、符号链接等不同写法共享同一缓存项
+        return _read_data_file(
+            str(file_path_obj.resolve()), suffix, file_size, file_stat.st_mtime_ns, max_rows
+        )
     except Exception as e:
         logging.error(f"文件加载失败 {file_path}: {str(e)}")
         raise ValueError(f"文件加载失败: {str(e)}")
 
 
-def detect_time_column(df: pl.DataFrame) -> Optional[str]:
+def detect_time_column(df: Union[pl.DataFrame, pl.LazyFrame]) -> Optional[str]:
     """
     自动检测时间列
 
@@ -81,115 +287,144 @@ def detect_time_column(df: pl.DataFrame) -> Optional[str]:
     2. 检查第一列数据类型是否为 datetime
     3. 尝试解析字符串列为日期时间格式
 
+    列名和类型只依赖 schema；传入 LazyFrame 时不会读取数据，
+    只有第 3 步才会对字符串列取少量样本值。
+
     Args:
-        df: 数据框
+        df: 数据框或延迟数据框
 
     Returns:
         Optional[str]: 检测到的时间列名或 None
     """
-    if df is None or df.is_empty():
+    if df is None or (isinstance(df, pl.DataFrame) and df.height == 0):
         return None
 
-    # 时间列名称模式
-    time_patterns = [
-        r"datetime",
-        r"date",
-        r"time",
-        r"timestamp",
-        r"tagtime",
-        r"日期",
-        r"时间",
-        r"年月日",
-        r"年月",
-        r"年月日时分秒",
-    ]
+    lf = df.lazy()
 
-    # 检查列名匹配
-    for col in df.columns:
-        col_lower = col.lower()
-        for pattern in time_patterns:
-            if re.search(pattern, col_lower):
-                return col
-
-    # 检查数据类型
-    for col in df.columns:
-        dtype = df[col].dtype
-        if str(dtype).startswith("datetime") or str(dtype) == "date":
+    # 单次遍历 schema：列名匹配立即返回；同时记下第一个日期时间类型列
+    # 和所有字符串列，保持“列名 > 数据类型 > 取值”的优先级
+    temporal_column = None
+    string_columns = []
+    for col, dtype in lf.collect_schema().items():
+        if _TIME_NAME_RE.search(col.lower()):
             return col
+        if temporal_column is None and isinstance(dtype, _TEMPORAL_DTYPES):
+            temporal_column = col
+        elif isinstance(dtype, pl.String):
+            string_columns.append(col)
 
-    # 检查是否可以解析为日期时间
-    for col in df.columns:
-        if df[col].dtype == pl.Utf8:
-            try:
-                # 尝试解析第一行
-                sample_value = df[col].drop_nulls().head(1)[0]
-                if sample_value:
-                    # 检查是否是标准日期时间格式
-                    date_patterns = [
-                        r"\d{4}-\d{2}-\d{2}",  # YYYY-MM-DD
-                        r"\d{2}/\d{2}/\d{4}",  # MM/DD/YYYY
-                        r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}",  # YYYY-MM-DD HH:MM:SS
-                    ]
-                    for pattern in date_patterns:
-                        if re.search(pattern, str(sample_value)):
-                            return col
-            except (IndexError, ValueError):
-                continue
+    if temporal_column is not None:
+        return temporal_column
+
+    # 检查是否可以解析为日期时间：一次 select 取出所有字符串列的首个非空值
+    if not string_columns:
+        return None
+
+    # 只在前 100 行中寻找首个非空值，避免对整列执行 drop_nulls；
+    # 前 100 行全为空的列才回退到整列查找
+    probe = lf.head(100).select(
+        pl.col(col).drop_nulls().first() for col in string_columns
+    ).collect().row(0, named=True)
+    missing = [col for col in string_columns if probe[col] is None]
+    if missing:
+        probe.update(
+            lf.select(
+                pl.col(col).drop_nulls().first() for col in missing
+            ).collect().row(0, named=True)
+        )
+
+    for col in string_columns:
+        sample_value = probe[col]
+        if sample_value and _DATE_VALUE_RE.search(sample_value):
+            return col
 
     return None
 
 
-def prepare_analysis_data(df: pl.DataFrame, sample_size: int = 100000) -> Dict[str, Any]:
+def prepare_analysis_data(
+    data: Union[pl.DataFrame, pl.LazyFrame], sample_size: int = 100000
+) -> Dict[str, Any]:
     """
     准备分析数据，分离时间列和数值列，支持大数据集优化（增强版本）
 
+    既可传入已加载的 DataFrame，也可传入 scan_data_file 返回的 LazyFrame；
+    后者只在确定采样范围后物化一次。
+
     Args:
-        df: 原始数据框
+        data: 原始数据框或延迟数据框
         sample_size: 大数据集采样大小（默认10万行）
 
     Returns:
         Dict[str, Any]: 包含时间列、数值列等信息的字典
     """
-    if df is None or df.is_empty():
+    if data is None:
         raise ValueError("数据框为空")
 
-    total_rows = len(df)
-    warnings_list = []
-    
-    # 大数据集采样
-    if total_rows > sample_size:
-        logging.info(f"大数据集采样: {total_rows} -> {sample_size} 行")
-        warnings_list.append(f"数据集过大，已采样至 {sample_size} 行进行分析")
-        df = df.sample(sample_size, seed=42)
+    # 列名与类型直接从查询计划获取，不触发数据读取
+    lf = data.lazy()
+    schema = lf.collect_schema()
 
-    time_column = detect_time_column(df)
+    if isinstance(data, pl.LazyFrame):
+        # 延迟输入来自文件扫描，使用流式引擎分批读取，避免整表驻留内存
+        engine = "streaming"
+        total_rows = lf.select(pl.len()).collect(engine=engine).item() if schema else 0
+    else:
+        engine = "auto"
+        total_rows = data.height if data.width else 0
+
+    if total_rows == 0:
+        raise ValueError("数据框为空")
+
+    time_column = detect_time_column(lf)
 
-    # 优化：使用select快速过滤数值列
+    # 优化：用 Polars 数值选择器在计划阶段筛选数值列（覆盖所有整数/浮点/Decimal 类型）
+    numeric_selector = cs.numeric()
     if time_column:
-        numeric_columns = [
-            col for col in df.columns
-            if col != time_column and df[col].dtype in (pl.Int64, pl.Int32, pl.Float64, pl.Float32)
-        ]
-    else:
-        numeric_columns = [
-            col for col in df.columns
-            if df[col].dtype in (pl.Int64, pl.Int32, pl.Float64, pl.Float32)
-        ]
+        numeric_selector = numeric_selector - cs.by_name(time_column)
+    numeric_columns = lf.select(numeric_selector).collect_schema().names()
 
     if not numeric_columns:
         raise ValueError("没有找到数值列进行分析")
 
-    # 预处理：检查并移除常数列（零方差列）
-    import numpy as np
+    warnings_list = []
+    
+    # 大数据集采样
+    if total_rows > sample_size:
+        logging.info(f"大数据集采样: {total_rows} -> {sample_size} 行")
+        warnings_list.append(f"数据集过大，已采样至 {sample_size} 行进行分析")
+        # 在延迟计划中做等间隔系统抽样：保留 floor(i*s/N) 递增处的行，
+        # 恰好 s 行且保持原始顺序，无需先物化全量数据再随机置换
+        row = pl.int_range(pl.len(), dtype=pl.Int64)
+        sampled_lf = lf.filter(
+            (row + 1) * sample_size // total_rows > row * sample_size // total_rows
+        )
+    else:
+        sampled_lf = lf
+
+    # 只物化时间列与数值列，其余列由投影下推跳过；所有列的缺失值计数
+    # 和数值列的样本标准差通过 collect_all 与之共享同一次扫描（公共子计划消除）
+    kept_columns = ([time_column] if time_column else []) + numeric_columns
+    df, null_count_df, std_df = pl.collect_all(
+        [
+            sampled_lf.select(kept_columns),
+            sampled_lf.select(pl.all().null_count()),
+            sampled_lf.select(pl.col(numeric_columns).std(ddof=1)),
+        ],
+        engine=engine
+    )
+    sampled_rows = df.height
+    null_counts = null_count_df.row(0, named=True)
+    column_stds = std_df.row(0, named=True)
+
+    # 预处理：检查并移除常数列（零方差列），统计量均来自上面的融合查询
     valid_numeric_columns = []
     constant_columns = []
     
     for col in numeric_columns:
-        col_data = df[col].drop_nulls()
-        if len(col_data) > 0:
-            values = col_data.to_numpy()
-            col_std = np.std(values, ddof=1)
-            if col_std < 1e-10:  # 接近零的阈值
+        if null_counts[col] < sampled_rows:
+            col_std = column_stds[col]
+            # 只有一个有效值时标准差为 null，同样视为常数列
+            if col_std is None or col_std < 1e-10:  # 接近零的阈值
                 constant_columns.append(col)
                 warnings_list.append(f"列 '{col}' 为常数列，已从数值分析中排除")
             else:
@@ -206,116 +441,42 @@ def prepare_analysis_data(df: pl.DataFrame, sample_size: int = 100000) -> Dict[s
     # 数据预处理优化：使用lazy evaluation
     processed_df = df.lazy()
 
-    # 转换时间列为 datetime 类型（修复版本）
+    # 转换时间列为 datetime 类型（样本定格式，整列只解析一次）
     if time_column:
-        col_dtype = df[time_column].dtype
-        if col_dtype == pl.Utf8:
+        col_dtype = schema[time_column]
+        if isinstance(col_dtype, pl.String):
             try:
-                # 首先去除前导和尾随空格
-                processed_df = processed_df.with_columns(
-                    pl.col(time_column).str.strip_chars().alias(time_column)
-                )
-                
-                # 尝试使用 Polars 的自动日期解析（更智能）
-                try:
-                    test_conversion = processed_df.with_columns(
-                        pl.col(time_column).str.strptime(pl.Datetime, strict=False)
-                    ).collect()
-                    
-                    # 检查转换结果是否有效（非全部为null）
-                    non_null_count = test_conversion[time_column].drop_nulls().len()
-                    if non_null_count > 0:
-                        logging.info(f"时间列 '{time_column}' 自动解析成功，有效值: {non_null_count}")
-                        processed_df = processed_df.with_columns(
-                            pl.col(time_column).str.strptime(pl.Datetime, strict=False)
-                        )
-                        converted_col = time_column
-                    else:
-                        # 如果自动解析失败，尝试具体格式
-                        time_formats = [
-                            "%Y-%m-%d %H:%M:%S%.f",
-                            "%Y-%m-%d %H:%M:%S", 
-                            "%Y-%m-%d",
-                            "%Y/%m/%d %H:%M:%S",
-                            "%Y/%m/%d",
-                            "%m/%d/%Y %H:%M:%S",
-                            "%m/%d/%Y",
-                            "%d/%m/%Y %H:%M:%S",
-                            "%d/%m/%Y"
-                        ]
-                        
-                        converted_col = None
-                        for fmt in time_formats:
-                            try:
-                                # 尝试当前格式
-                                test_conversion = processed_df.with_columns(
-                                    pl.col(time_column).str.strptime(pl.Datetime, format=fmt, strict=False)
-                                ).collect()
-                                
-                                # 检查转换结果是否有效（非全部为null）
-                                non_null_count = test_conversion[time_column].drop_nulls().len()
-                                if non_null_count > 0:
-                                    logging.info(f"时间列 '{time_column}' 使用格式 '{fmt}' 成功转换，有效值: {non_null_count}")
-                                    processed_df = processed_df.with_columns(
-                                        pl.col(time_column).str.strptime(pl.Datetime, format=fmt, strict=False)
-                                    )
-                                    converted_col = time_column
-                                    break
-                            except Exception:
-                                continue
-                        
-                        if converted_col is None:
-                            warnings_list.append(f"时间列 '{time_column}' 无法转换为日期时间格式，将作为普通列处理")
-                            time_column = None
-                            
-                except Exception as e:
-                    warnings_list.append(f"时间列 '{time_column}' 自动解析失败: {str(e)}")
-                    # 降级到具体格式尝试
-                    time_formats = [
-                        "%Y-%m-%d %H:%M:%S%.f",
-                        "%Y-%m-%d %H:%M:%S", 
-                        "%Y-%m-%d",
-                        "%Y/%m/%d %H:%M:%S",
-                        "%Y/%m/%d",
-                        "%m/%d/%Y %H:%M:%S",
-                        "%m/%d/%Y",
-                        "%d/%m/%Y %H:%M:%S",
-                        "%d/%m/%Y"
-                    ]
-                    
-                    converted_col = None
-                    for fmt in time_formats:
-                        try:
-                            # 尝试当前格式
-                            test_conversion = processed_df.with_columns(
-                                pl.col(time_column).str.strptime(pl.Datetime, format=fmt, strict=False)
-                            ).collect()
-                            
-                            # 检查转换结果是否有效（非全部为null）
-                            non_null_count = test_conversion[time_column].drop_nulls().len()
-                            if non_null_count > 0:
-                                logging.info(f"时间列 '{time_column}' 使用格式 '{fmt}' 成功转换，有效值: {non_null_count}")
-                                processed_df = processed_df.with_columns(
-                                    pl.col(time_column).str.strptime(pl.Datetime, format=fmt, strict=False)
-                                )
-                                converted_col = time_column
-                                break
-                        except Exception:
-                            continue
-                    
-                    if converted_col is None:
-                        warnings_list.append(f"时间列 '{time_column}' 无法转换为日期时间格式，将作为普通列处理")
-                        time_column = None
-                    
+                # 先在小样本上确定格式，再对整列只做一次解析
+                time_values = df.get_column(time_column)
+                formats = _sniff_time_formats(time_values)
+                if formats:
+                    # 取值基本唯一（带时分秒的时间戳）时关闭解析缓存，省去逐值哈希；
+                    # 大量重复（如纯日期）时缓存可跳过重复解析
+                    head = time_values.head(_FORMAT_PROBE_SIZE)
+                    cache = head.n_unique() * 2 <= head.len()
+                    parsed = df.select(
+                        _build_datetime_expr(time_column, formats, cache=cache)
+                    ).to_series()
+                    non_null_count = parsed.len() - parsed.null_count()
+                else:
+                    non_null_count = 0
+                if non_null_count > 0:
+                    logging.info(f"时间列 '{time_column}' 解析成功，有效值: {non_null_count}")
+                    processed_df = processed_df.with_columns(parsed)
+                else:
+                    warnings_list.append(f"时间列 '{time_column}' 无法转换为日期时间格式，将不进行时间序列分析")
+                    time_column = None
             except Exception as e:
                 warnings_list.append(f"时间列 '{time_column}' 转换失败: {str(e)}")
                 time_column = None
-        elif str(col_dtype).startswith("datetime"):
+        elif isinstance(col_dtype, pl.Datetime):
             pass  # 已经是datetime类型
 
-    # 收集结果
+    # 收集结果：下游只需要时间列和有效数值列
     try:
-        processed_df = processed_df.collect()
+        processed_df = processed_df.select(
+            ([time_column] if time_column else []) + numeric_columns
+        ).collect()
     except Exception as e:
         logging.error(f"数据处理失败: {str(e)}")
         # 回退到原始数据框
@@ -329,26 +490,23 @@ def prepare_analysis_data(df: pl.DataFrame, sample_size: int = 100000) -> Dict[s
         except Exception as e:
             warnings_list.append(f"时间排序失败: {str(e)}")
 
-    # 优化：批量计算缺失值
-    missing_values = {}
-    for col in df.columns:
-        null_count = df[col].null_count()
-        missing_values[col] = {
+    # 缺失计数来自（可能已采样的）数据，比例也必须以采样后的行数为分母
+    missing_values = {
+        col: {
             "missing_count": null_count,
-            "missing_ratio": null_count / total_rows if total_rows > 0 else 0
+            "missing_ratio": null_count / sampled_rows if sampled_rows > 0 else 0
         }
-
-    # 内存优化：释放不需要的数据
-    sampled_rows = len(df)
+        for col, null_count in null_counts.items()
+    }
+    total_missing = sum(null_counts.values())
     
     return {
-        "original_df": df,
         "processed_df": processed_df,
         "time_column": time_column,
         "numeric_columns": numeric_columns,
         "constant_columns": constant_columns,
         "total_rows": total_rows,
-        "total_columns": len(df.columns),
+        "total_columns": schema.len(),
         "sampled_rows": sampled_rows,
         "missing_values": missing_values,
         "warnings": warnings_list,
@@ -356,6 +514,6 @@ def prepare_analysis_data(df: pl.DataFrame, sample_size: int = 100000) -> Dict[s
             "valid_numeric_columns": len(numeric_columns),
             "constant_columns_count": len(constant_columns),
             "has_time_column": time_column is not None,
-            "missing_data_ratio": sum(info["missing_count"] for info in missing_values.values()) / (total_rows * len(df.columns)) if total_rows > 0 else 0
+            "missing_data_ratio": total_missing / (sampled_rows * schema.len()) if sampled_rows > 0 else 0
         }
     }
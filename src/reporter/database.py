@@ -7,22 +7,39 @@
 - 数据库初始化和迁移
 """
 
+import asyncio
 import aiosqlite
 import hashlib
 import json
+import sqlite3
+import zlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict, Any
-from dataclasses import dataclass, asdict
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple, Union
+from dataclasses import dataclass, replace
 import logging
 
+from .utils import json_utils
+
 logger = logging.getLogger(__name__)
 
-# 数据库文件路径
+# 数据库文件路径（WAL 模式依赖共享内存，数据库目录须位于本地文件系统，不能放在 NFS 等网络存储上）
 DB_PATH = Path("data/database/history.db")
 
+# 打开连接时依次执行的 PRAGMA：WAL + synchronous=NORMAL 避免每次提交都 fsync
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
+
 
-@dataclass
+@dataclass(slots=True)
 class FileRecord:
     """文件记录数据模型"""
     id: Optional[int] = None
@@ -36,13 +53,19 @@ class FileRecord:
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
-        data = asdict(self)
-        if self.upload_time:
-            data['upload_time'] = self.upload_time.isoformat()
-        return data
-
-
-@dataclass
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'original_filename': self.original_filename,
+            'file_hash': self.file_hash,
+            'file_size': self.file_size,
+            'file_type': self.file_type,
+            'upload_time': self.upload_time.isoformat() if self.upload_time else None,
+            'file_path': self.file_path
+        }
+
+
+@dataclass(slots=True)
 class AnalysisRecord:
     """分析记录数据模型"""
     id: Optional[int] = None
@@ -53,15 +76,132 @@ class AnalysisRecord:
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
-        data = asdict(self)
-        if self.analysis_time:
-            data['analysis_time'] = self.analysis_time.isoformat()
         # 解析JSON结果
         try:
-            data['analysis_result'] = json.loads(self.analysis_result)
+            analysis_result = json_utils.loads(self.analysis_result)
         except (json.JSONDecodeError, TypeError):
-            data['analysis_result'] = {}
-        return data
+            analysis_result = {}
+        return {
+            'id': self.id,
+            'file_id': self.file_id,
+            'analysis_time': self.analysis_time.isoformat() if self.analysis_time else None,
+            'analysis_result': analysis_result,
+            'result_file_path': self.result_file_path
+        }
+
+
+_INSERT_FILE_SQL = """
+    INSERT INTO files (filename, original_filename, file_hash, file_size, file_type, file_path)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_ANALYSIS_SQL = """
+    INSERT INTO analysis_records (file_id, analysis_result, analysis_result_blob, result_file_path)
+    VALUES (?, ?, ?, ?)
+"""
+
+
+def _build_file_history_sql(by_type: bool, keyset: bool) -> str:
+    """拼装历史分页 SQL
+
+    analysis_count / last_analysis_time 由触发器维护，分页只扫描 files 表；
+    keyset 分页以上一页最后一条的 (upload_time, id) 为游标，代价与偏移量无关。
+    """
+    conditions = []
+    if by_type:
+        conditions.append("file_type = ?")
+    if keyset:
+        conditions.append("(upload_time, id) < (?, ?)")
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    limit_clause = "LIMIT ?" if keyset else "LIMIT ? OFFSET ?"
+    return f"""
+        SELECT * FROM files
+        {where_clause}
+        ORDER BY upload_time DESC, id DESC
+        {limit_clause}
+    """
+
+
+# (是否按类型筛选, 是否游标分页) -> 预先拼好的 SQL
+_FILE_HISTORY_SQL = {
+    (by_type, keyset): _build_file_history_sql(by_type, keyset)
+    for by_type in (False, True)
+    for keyset in (False, True)
+}
+
+# get_file_by_hash 的 LRU 缓存容量
+_HASH_CACHE_SIZE = 512
+
+# 连接级预编译语句缓存容量（sqlite3 以 SQL 文本为键复用已编译语句）
+_STATEMENT_CACHE_SIZE = 256
+
+
+def _hash_to_db(file_hash: str) -> Union[bytes, str]:
+    """十六进制哈希 -> 数据库存储的原始摘要字节（无法解析时原样保存）"""
+    try:
+        return bytes.fromhex(file_hash)
+    except ValueError:
+        return file_hash
+
+
+def _hash_from_db(value: Union[bytes, str]) -> str:
+    """数据库中的摘要 -> 对外使用的十六进制字符串"""
+    return value.hex() if isinstance(value, bytes) else value
+
+
+def _file_record_params(file_record: FileRecord) -> tuple:
+    """文件记录 -> INSERT 参数"""
+    return (
+        file_record.filename,
+        file_record.original_filename,
+        _hash_to_db(file_record.file_hash),
+        file_record.file_size,
+        file_record.file_type,
+        file_record.file_path
+    )
+
+
+# 超过该长度的分析结果压缩后存入 analysis_result_blob，小结果压缩收益为负，仍存文本
+_RESULT_COMPRESS_MIN_BYTES = 256
+_RESULT_COMPRESS_LEVEL = 6
+
+
+def _compress_result(analysis_result: str) -> Tuple[str, Optional[bytes]]:
+    """分析结果 -> (analysis_result 文本列, analysis_result_blob 压缩列)"""
+    encoded = analysis_result.encode('utf-8')
+    if len(encoded) < _RESULT_COMPRESS_MIN_BYTES:
+        return analysis_result, None
+    return "", zlib.compress(encoded, _RESULT_COMPRESS_LEVEL)
+
+
+def _decompress_result(row: aiosqlite.Row) -> str:
+    """从记录行还原分析结果 JSON 字符串（旧记录只有文本列）"""
+    blob = row['analysis_result_blob']
+    if blob is not None:
+        return zlib.decompress(blob).decode('utf-8')
+    return row['analysis_result']
+
+
+def _stat_result_files(rows: List[Tuple[int, str]]) -> List[Tuple[int, int]]:
+    """读取现有结果文件的大小，返回 (文件大小, 记录ID) 列表；缺失的文件跳过"""
+    updates = []
+    for analysis_id, result_file_path in rows:
+        try:
+            updates.append((Path(result_file_path).stat().st_size, analysis_id))
+        except OSError:
+            continue
+    return updates
+
+
+def _analysis_record_params(analysis_record: AnalysisRecord) -> tuple:
+    """分析记录 -> INSERT 参数"""
+    result_text, result_blob = _compress_result(analysis_record.analysis_result)
+    return (
+        analysis_record.file_id,
+        result_text,
+        result_blob,
+        analysis_record.result_file_path
+    )
 
 
 class DatabaseManager:
@@ -70,21 +210,78 @@ class DatabaseManager:
     def __init__(self, db_path: Path = DB_PATH):
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 长连接：首次使用时打开，之后所有查询复用同一个工作线程
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._conn_lock = asyncio.Lock()
+        # 写操作需保证 execute 与 commit 之间不被其他协程的事务穿插
+        self._write_lock = asyncio.Lock()
+        # SQLite 未编译 FTS5 时退回 LIKE 搜索
+        self._fts_enabled = False
+        # 文件哈希 -> 文件记录的 LRU 缓存（仅缓存命中结果），上传去重时免查数据库
+        self._hash_cache: "OrderedDict[str, FileRecord]" = OrderedDict()
+
+    async def _get_connection(self) -> aiosqlite.Connection:
+        """获取共享的数据库连接（惰性打开，并发的首次调用只会建立一个连接）"""
+        if self._conn is not None:
+            return self._conn
+        async with self._conn_lock:
+            if self._conn is None:
+                conn = await aiosqlite.connect(
+                    self.db_path, cached_statements=_STATEMENT_CACHE_SIZE
+                )
+                conn.row_factory = aiosqlite.Row
+                # journal_mode=WAL 会持久化到数据库文件，其余设置仅对当前连接生效
+                for pragma in _CONNECTION_PRAGMAS:
+                    await conn.execute(pragma)
+                await conn.commit()
+                self._conn = conn
+        return self._conn
+
+    @asynccontextmanager
+    async def _transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """写事务：持有写锁，正常结束时提交，异常时回滚
+
+        共享连接上若失败的写操作不回滚，未结束的事务会一直占用数据库写锁。
+        """
+        db = await self._get_connection()
+        async with self._write_lock:
+            try:
+                yield db
+            except BaseException:
+                await db.rollback()
+                raise
+            await db.commit()
+
+    async def close(self) -> None:
+        """关闭共享的数据库连接"""
+        async with self._conn_lock:
+            if self._conn is not None:
+                await self._conn.close()
+                self._conn = None
+
+    async def __aenter__(self) -> "DatabaseManager":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        # 共享连接运行在非守护线程上，不关闭则进程无法退出
+        await self.close()
 
     async def init_database(self) -> None:
         """初始化数据库表结构"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._transaction() as db:
             # 创建文件信息表
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS files (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     filename TEXT NOT NULL,
                     original_filename TEXT NOT NULL,
-                    file_hash TEXT UNIQUE NOT NULL,
+                    file_hash BLOB UNIQUE NOT NULL,
                     file_size INTEGER NOT NULL,
                     file_type TEXT NOT NULL,
                     upload_time DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    file_path TEXT NOT NULL
+                    file_path TEXT NOT NULL,
+                    analysis_count INTEGER NOT NULL DEFAULT 0,
+                    last_analysis_time DATETIME
                 )
             """)
 
@@ -96,19 +293,172 @@ class DatabaseManager:
                     analysis_time DATETIME DEFAULT CURRENT_TIMESTAMP,
                     analysis_result TEXT NOT NULL,
                     result_file_path TEXT NOT NULL,
+                    analysis_result_blob BLOB,
+                    result_file_size INTEGER NOT NULL DEFAULT 0,
                     FOREIGN KEY (file_id) REFERENCES files(id)
                 )
             """)
 
             # 创建索引
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_files_hash ON files(file_hash)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_files_upload_time ON files(upload_time)")
+            # UNIQUE 约束自带索引，额外的 idx_files_hash 只会重复占用空间
+            await db.execute("DROP INDEX IF EXISTS idx_files_hash")
+            # 历史分页按 (upload_time, id) 倒序扫描；类型筛选走 (file_type, upload_time, id) 范围扫描，无需排序
+            await db.execute("DROP INDEX IF EXISTS idx_files_upload_time")
+            await db.execute("DROP INDEX IF EXISTS idx_files_type")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_files_upload_time_id ON files(upload_time DESC, id DESC)")
+            await db.execute("DROP INDEX IF EXISTS idx_files_type_time")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_files_type_time_id ON files(file_type, upload_time DESC, id DESC)")
             await db.execute("CREATE INDEX IF NOT EXISTS idx_analysis_time ON analysis_records(analysis_time)")
             await db.execute("CREATE INDEX IF NOT EXISTS idx_analysis_file_id ON analysis_records(file_id)")
 
-            await db.commit()
+            await self._migrate_hash_to_blob(db)
+            await self._migrate_result_blob(db)
+            await self._migrate_result_file_size(db)
+            await self._migrate_analysis_summary(db)
+            self._fts_enabled = await self._init_filename_fts(db)
+
             logger.info("数据库初始化完成")
 
+    async def _migrate_hash_to_blob(self, db: aiosqlite.Connection) -> None:
+        """将旧库中以 64 位十六进制文本存储的 file_hash 转为 32 字节 BLOB
+
+        SQLite 列类型是动态的，BLOB 值不受旧列声明的 TEXT 亲和性影响，原地更新即可，
+        UNIQUE 索引随之变为按原始摘要比较。
+        """
+        cursor = await db.execute(
+            "SELECT id, file_hash FROM files WHERE typeof(file_hash) = 'text'"
+        )
+        updates = []
+        for row in await cursor.fetchall():
+            digest = _hash_to_db(row['file_hash'])
+            if isinstance(digest, bytes):
+                updates.append((digest, row['id']))
+        if updates:
+            await db.executemany("UPDATE files SET file_hash = ? WHERE id = ?", updates)
+            logger.info(f"已将 {len(updates)} 条文件哈希转换为二进制存储")
+
+    async def _migrate_result_blob(self, db: aiosqlite.Connection) -> None:
+        """为旧库补充压缩结果列；旧记录保留文本列作为读取回退"""
+        cursor = await db.execute("PRAGMA table_info(analysis_records)")
+        columns = {row['name'] for row in await cursor.fetchall()}
+        if 'analysis_result_blob' not in columns:
+            await db.execute("ALTER TABLE analysis_records ADD COLUMN analysis_result_blob BLOB")
+
+    async def _migrate_result_file_size(self, db: aiosqlite.Connection) -> None:
+        """为旧库补充结果文件大小列，并按磁盘上现有的结果文件回填"""
+        cursor = await db.execute("PRAGMA table_info(analysis_records)")
+        columns = {row['name'] for row in await cursor.fetchall()}
+        if 'result_file_size' in columns:
+            return
+        await db.execute(
+            "ALTER TABLE analysis_records ADD COLUMN result_file_size INTEGER NOT NULL DEFAULT 0"
+        )
+        cursor = await db.execute(
+            "SELECT id, result_file_path FROM analysis_records WHERE result_file_path != ''"
+        )
+        rows = [(row['id'], row['result_file_path']) for row in await cursor.fetchall()]
+        updates = await asyncio.to_thread(_stat_result_files, rows)
+        if updates:
+            await db.executemany(
+                "UPDATE analysis_records SET result_file_size = ? WHERE id = ?", updates
+            )
+        logger.info(f"已为 {len(updates)} 条分析记录回填结果文件大小")
+
+    async def _migrate_analysis_summary(self, db: aiosqlite.Connection) -> None:
+        """维护 files 表上的分析次数/最近分析时间汇总列
+
+        汇总列由触发器随 analysis_records 的增删同步更新，
+        历史列表分页因此无需 JOIN + GROUP BY。旧库首次升级时补列并回填。
+        """
+        cursor = await db.execute("PRAGMA table_info(files)")
+        columns = {row['name'] for row in await cursor.fetchall()}
+        if 'analysis_count' not in columns:
+            await db.execute(
+                "ALTER TABLE files ADD COLUMN analysis_count INTEGER NOT NULL DEFAULT 0"
+            )
+            await db.execute("ALTER TABLE files ADD COLUMN last_analysis_time DATETIME")
+            await db.execute("""
+                UPDATE files SET
+                    analysis_count = (SELECT COUNT(*) FROM analysis_records ar WHERE ar.file_id = files.id),
+                    last_analysis_time = (SELECT MAX(ar.analysis_time) FROM analysis_records ar WHERE ar.file_id = files.id)
+            """)
+            logger.info("已为 files 表补充分析汇总列")
+
+        await db.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_analysis_records_insert
+            AFTER INSERT ON analysis_records
+            BEGIN
+                UPDATE files SET
+                    analysis_count = analysis_count + 1,
+                    last_analysis_time = MAX(COALESCE(last_analysis_time, NEW.analysis_time), NEW.analysis_time)
+                WHERE id = NEW.file_id;
+            END
+        """)
+        await db.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_analysis_records_delete
+            AFTER DELETE ON analysis_records
+            BEGIN
+                UPDATE files SET
+                    analysis_count = analysis_count - 1,
+                    last_analysis_time = (
+                        SELECT MAX(analysis_time) FROM analysis_records WHERE file_id = OLD.file_id
+                    )
+                WHERE id = OLD.file_id;
+            END
+        """)
+
+    async def _init_filename_fts(self, db: aiosqlite.Connection) -> bool:
+        """创建文件名全文索引（FTS5 trigram，外部内容表指向 files）
+
+        trigram 分词支持任意位置的子串匹配（含中文），语义与 LIKE '%q%' 一致。
+        
+        Returns:
+            bool: 全文索引是否可用
+        """
+        cursor = await db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'files_fts'"
+        )
+        exists = await cursor.fetchone() is not None
+        try:
+            await db.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+                    original_filename, filename,
+                    content='files', content_rowid='id', tokenize='trigram'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite 不支持 FTS5 trigram，文件搜索退回 LIKE 扫描: {e}")
+            return False
+
+        await db.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_files_fts_insert AFTER INSERT ON files
+            BEGIN
+                INSERT INTO files_fts(rowid, original_filename, filename)
+                VALUES (NEW.id, NEW.original_filename, NEW.filename);
+            END
+        """)
+        await db.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_files_fts_delete AFTER DELETE ON files
+            BEGIN
+                INSERT INTO files_fts(files_fts, rowid, original_filename, filename)
+                VALUES ('delete', OLD.id, OLD.original_filename, OLD.filename);
+            END
+        """)
+        await db.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_files_fts_update
+            AFTER UPDATE OF original_filename, filename ON files
+            BEGIN
+                INSERT INTO files_fts(files_fts, rowid, original_filename, filename)
+                VALUES ('delete', OLD.id, OLD.original_filename, OLD.filename);
+                INSERT INTO files_fts(rowid, original_filename, filename)
+                VALUES (NEW.id, NEW.original_filename, NEW.filename);
+            END
+        """)
+        if not exists:
+            # 旧库首次启用全文索引时，从 files 表重建
+            await db.execute("INSERT INTO files_fts(files_fts) VALUES ('rebuild')")
+        return True
+
     async def add_file_record(self, file_record: FileRecord) -> int:
         """添加文件记录
         
@@ -118,19 +468,9 @@ class DatabaseManager:
         Returns:
             int: 新插入记录的ID
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("""
-                INSERT INTO files (filename, original_filename, file_hash, file_size, file_type, file_path)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                file_record.filename,
-                file_record.original_filename,
-                file_record.file_hash,
-                file_record.file_size,
-                file_record.file_type,
-                file_record.file_path
-            ))
-            await db.commit()
+        self._hash_cache.pop(file_record.file_hash.lower(), None)
+        async with self._transaction() as db:
+            cursor = await db.execute(_INSERT_FILE_SQL, _file_record_params(file_record))
             return cursor.lastrowid
 
     async def get_file_by_hash(self, file_hash: str) -> Optional[FileRecord]:
@@ -142,24 +482,34 @@ class DatabaseManager:
         Returns:
             Optional[FileRecord]: 文件记录，如果不存在则返回None
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute(
-                "SELECT * FROM files WHERE file_hash = ?", (file_hash,)
+        cache_key = file_hash.lower()
+        cached = self._hash_cache.get(cache_key)
+        if cached is not None:
+            self._hash_cache.move_to_end(cache_key)
+            # 返回副本，调用方修改记录不会污染缓存
+            return replace(cached)
+
+        db = await self._get_connection()
+        cursor = await db.execute(
+            "SELECT * FROM files WHERE file_hash = ?", (_hash_to_db(file_hash),)
+        )
+        row = await cursor.fetchone()
+        if row:
+            record = FileRecord(
+                id=row['id'],
+                filename=row['filename'],
+                original_filename=row['original_filename'],
+                file_hash=_hash_from_db(row['file_hash']),
+                file_size=row['file_size'],
+                file_type=row['file_type'],
+                upload_time=datetime.fromisoformat(row['upload_time']),
+                file_path=row['file_path']
             )
-            row = await cursor.fetchone()
-            if row:
-                return FileRecord(
-                    id=row['id'],
-                    filename=row['filename'],
-                    original_filename=row['original_filename'],
-                    file_hash=row['file_hash'],
-                    file_size=row['file_size'],
-                    file_type=row['file_type'],
-                    upload_time=datetime.fromisoformat(row['upload_time']),
-                    file_path=row['file_path']
-                )
-            return None
+            self._hash_cache[cache_key] = record
+            if len(self._hash_cache) > _HASH_CACHE_SIZE:
+                self._hash_cache.popitem(last=False)
+            return replace(record)
+        return None
 
     async def add_analysis_record(self, analysis_record: AnalysisRecord) -> int:
         """添加分析记录
@@ -170,16 +520,10 @@ class DatabaseManager:
         Returns:
             int: 新插入记录的ID
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("""
-                INSERT INTO analysis_records (file_id, analysis_result, result_file_path)
-                VALUES (?, ?, ?)
-            """, (
-                analysis_record.file_id,
-                analysis_record.analysis_result,
-                analysis_record.result_file_path
-            ))
-            await db.commit()
+        async with self._transaction() as db:
+            cursor = await db.execute(
+                _INSERT_ANALYSIS_SQL, _analysis_record_params(analysis_record)
+            )
             return cursor.lastrowid
 
     async def get_latest_analysis_by_file_id(self, file_id: int) -> Optional[AnalysisRecord]:
@@ -191,80 +535,67 @@ class DatabaseManager:
         Returns:
             Optional[AnalysisRecord]: 最新的分析记录
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute("""
-                SELECT * FROM analysis_records 
-                WHERE file_id = ? 
-                ORDER BY analysis_time DESC 
-                LIMIT 1
-            """, (file_id,))
-            row = await cursor.fetchone()
-            if row:
-                     return AnalysisRecord(
-                         id=row['id'],
-                         file_id=row['file_id'],
-                         analysis_time=datetime.fromisoformat(row['analysis_time']),
-                         analysis_result=row['analysis_result'],
-                         result_file_path=row['result_file_path']
-                     )
-            return None
+        db = await self._get_connection()
+        cursor = await db.execute("""
+            SELECT * FROM analysis_records 
+            WHERE file_id = ? 
+            ORDER BY analysis_time DESC 
+            LIMIT 1
+        """, (file_id,))
+        row = await cursor.fetchone()
+        if row:
+            return AnalysisRecord(
+                id=row['id'],
+                file_id=row['file_id'],
+                analysis_time=datetime.fromisoformat(row['analysis_time']),
+                analysis_result=_decompress_result(row),
+                result_file_path=row['result_file_path']
+            )
+        return None
 
     async def get_file_history(self, limit: int = 50, offset: int = 0, 
-                              file_type: Optional[str] = None) -> List[Dict[str, Any]]:
+                              file_type: Optional[str] = None,
+                              cursor: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
         """获取文件历史记录
         
         Args:
             limit: 返回记录数限制
-            offset: 偏移量
+            offset: 偏移量（提供 cursor 时忽略）
             file_type: 文件类型筛选（csv/parquet）
+            cursor: 上一页最后一条记录的 (upload_time, id)，提供时使用游标分页
             
         Returns:
             List[Dict]: 文件历史记录列表
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            
-            # 构建查询条件
-            where_clause = ""
-            params = []
-            if file_type:
-                where_clause = "WHERE f.file_type = ?"
-                params.append(file_type)
-            
-            query = f"""
-                SELECT f.*, 
-                       COUNT(ar.id) as analysis_count,
-                       MAX(ar.analysis_time) as last_analysis_time
-                FROM files f
-                LEFT JOIN analysis_records ar ON f.id = ar.file_id
-                {where_clause}
-                GROUP BY f.id
-                ORDER BY f.upload_time DESC
-                LIMIT ? OFFSET ?
-            """
+        db = await self._get_connection()
+        # 选择预先拼好的 SQL，保证命中连接上的语句缓存
+        query = _FILE_HISTORY_SQL[(bool(file_type), cursor is not None)]
+        params: List[Any] = [file_type] if file_type else []
+        if cursor is not None:
+            params.extend([cursor[0], cursor[1], limit])
+        else:
             params.extend([limit, offset])
-            
-            cursor = await db.execute(query, params)
-            rows = await cursor.fetchall()
-            
-            result = []
-            for row in rows:
-                file_data = {
-                    'id': row['id'],
-                    'filename': row['filename'],
-                    'original_filename': row['original_filename'],
-                    'file_hash': row['file_hash'],
-                    'file_size': row['file_size'],
-                    'file_type': row['file_type'],
-                    'upload_time': row['upload_time'],
-                    'file_path': row['file_path'],
-                    'analysis_count': row['analysis_count'],
-                    'last_analysis_time': row['last_analysis_time']
-                }
-                result.append(file_data)
-            
-            return result
+
+        rows_cursor = await db.execute(query, params)
+        rows = await rows_cursor.fetchall()
+
+        result = []
+        for row in rows:
+            file_data = {
+                'id': row['id'],
+                'filename': row['filename'],
+                'original_filename': row['original_filename'],
+                'file_hash': _hash_from_db(row['file_hash']),
+                'file_size': row['file_size'],
+                'file_type': row['file_type'],
+                'upload_time': row['upload_time'],
+                'file_path': row['file_path'],
+                'analysis_count': row['analysis_count'],
+                'last_analysis_time': row['last_analysis_time']
+            }
+            result.append(file_data)
+
+        return result
 
     async def search_files(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
         """搜索文件
@@ -276,42 +607,82 @@ class DatabaseManager:
         Returns:
             List[Dict]: 匹配的文件记录
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            
-            search_pattern = f"%{query}%"
+        db = await self._get_connection()
+        # trigram 至少需要 3 个字符，更短的关键词仍走 LIKE
+        if self._fts_enabled and len(query) >= 3:
+            # 作为短语匹配，双引号转义后不会被解析成 FTS 查询语法
+            phrase = '"' + query.replace('"', '""') + '"'
             cursor = await db.execute("""
-                SELECT f.*, 
-                       COUNT(ar.id) as analysis_count,
-                       MAX(ar.analysis_time) as last_analysis_time
-                FROM files f
-                LEFT JOIN analysis_records ar ON f.id = ar.file_id
-                WHERE f.original_filename LIKE ? OR f.filename LIKE ?
-                GROUP BY f.id
+                SELECT f.* FROM files_fts
+                JOIN files f ON f.id = files_fts.rowid
+                WHERE files_fts MATCH ?
                 ORDER BY f.upload_time DESC
                 LIMIT ?
+            """, (phrase, limit))
+        else:
+            search_pattern = f"%{query}%"
+            cursor = await db.execute("""
+                SELECT * FROM files
+                WHERE original_filename LIKE ? OR filename LIKE ?
+                ORDER BY upload_time DESC
+                LIMIT ?
             """, (search_pattern, search_pattern, limit))
-            
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
 
-    async def update_analysis_result_path(self, analysis_id: int, result_file_path: str) -> bool:
-        """更新分析记录的结果文件路径
+        rows = await cursor.fetchall()
+        result = []
+        for row in rows:
+            file_data = dict(row)
+            file_data['file_hash'] = _hash_from_db(row['file_hash'])
+            result.append(file_data)
+        return result
+
+    async def get_file_stats(self) -> Dict[str, Any]:
+        """基于数据库记录汇总存储统计，无需遍历文件系统
+        
+        Returns:
+            Dict: {'file_types': {类型: {'count', 'size_bytes'}},
+                   'analysis_results': {'total_results', 'total_size_bytes'}}
+        """
+        db = await self._get_connection()
+        cursor = await db.execute(
+            "SELECT file_type, COUNT(*), COALESCE(SUM(file_size), 0) FROM files GROUP BY file_type"
+        )
+        file_types = {
+            row[0]: {'count': row[1], 'size_bytes': row[2]}
+            for row in await cursor.fetchall()
+        }
+        cursor = await db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(result_file_size), 0) FROM analysis_records "
+            "WHERE result_file_path != ''"
+        )
+        total_results, total_size = await cursor.fetchone()
+        return {
+            'file_types': file_types,
+            'analysis_results': {
+                'total_results': total_results,
+                'total_size_bytes': total_size
+            }
+        }
+
+    async def update_analysis_result_path(self, analysis_id: int, result_file_path: str,
+                                          result_file_size: int = 0) -> bool:
+        """更新分析记录的结果文件路径和大小
         
         Args:
             analysis_id: 分析ID
             result_file_path: 结果文件路径
+            result_file_size: 结果文件大小（字节），供存储统计直接汇总
             
         Returns:
             bool: 是否更新成功
         """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._transaction() as db:
                 await db.execute(
-                    "UPDATE analysis_records SET result_file_path = ? WHERE id = ?",
-                    (result_file_path, analysis_id)
+                    "UPDATE analysis_records SET result_file_path = ?, result_file_size = ? "
+                    "WHERE id = ?",
+                    (result_file_path, result_file_size, analysis_id)
                 )
-                await db.commit()
                 return True
         except Exception as e:
             logger.error(f"更新分析结果路径失败: {e}")
@@ -327,26 +698,25 @@ class DatabaseManager:
             Optional[FileRecord]: 文件记录，如果不存在则返回None
         """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute(
-                    "SELECT * FROM files WHERE id = ?",
-                    (file_id,)
+            db = await self._get_connection()
+            cursor = await db.execute(
+                "SELECT * FROM files WHERE id = ?",
+                (file_id,)
+            )
+            row = await cursor.fetchone()
+
+            if row:
+                return FileRecord(
+                    id=row['id'],
+                    filename=row['filename'],
+                    original_filename=row['original_filename'],
+                    file_hash=_hash_from_db(row['file_hash']),
+                    file_size=row['file_size'],
+                    file_type=row['file_type'],
+                    upload_time=datetime.fromisoformat(row['upload_time']),
+                    file_path=row['file_path']
                 )
-                row = await cursor.fetchone()
-                
-                if row:
-                    return FileRecord(
-                        id=row['id'],
-                        filename=row['filename'],
-                        original_filename=row['original_filename'],
-                        file_hash=row['file_hash'],
-                        file_size=row['file_size'],
-                        file_type=row['file_type'],
-                        upload_time=datetime.fromisoformat(row['upload_time']),
-                        file_path=row['file_path']
-                    )
-                return None
+            return None
         except Exception as e:
             logger.error(f"获取文件记录失败: {e}")
             return None
@@ -361,26 +731,25 @@ class DatabaseManager:
             Optional[FileRecord]: 文件记录，如果不存在则返回None
         """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute(
-                    "SELECT * FROM files WHERE filename = ? OR original_filename = ? ORDER BY upload_time DESC LIMIT 1",
-                    (filename, filename)
+            db = await self._get_connection()
+            cursor = await db.execute(
+                "SELECT * FROM files WHERE filename = ? OR original_filename = ? ORDER BY upload_time DESC LIMIT 1",
+                (filename, filename)
+            )
+            row = await cursor.fetchone()
+
+            if row:
+                return FileRecord(
+                    id=row['id'],
+                    filename=row['filename'],
+                    original_filename=row['original_filename'],
+                    file_hash=_hash_from_db(row['file_hash']),
+                    file_size=row['file_size'],
+                    file_type=row['file_type'],
+                    upload_time=datetime.fromisoformat(row['upload_time']),
+                    file_path=row['file_path']
                 )
-                row = await cursor.fetchone()
-                
-                if row:
-                    return FileRecord(
-                        id=row['id'],
-                        filename=row['filename'],
-                        original_filename=row['original_filename'],
-                        file_hash=row['file_hash'],
-                        file_size=row['file_size'],
-                        file_type=row['file_type'],
-                        upload_time=datetime.fromisoformat(row['upload_time']),
-                        file_path=row['file_path']
-                    )
-                return None
+            return None
         except Exception as e:
             logger.error(f"根据文件名获取文件记录失败: {e}")
             return None
@@ -395,23 +764,22 @@ class DatabaseManager:
             Optional[AnalysisRecord]: 分析记录，如果不存在则返回None
         """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute(
-                    "SELECT * FROM analysis_records WHERE id = ?",
-                    (analysis_id,)
+            db = await self._get_connection()
+            cursor = await db.execute(
+                "SELECT * FROM analysis_records WHERE id = ?",
+                (analysis_id,)
+            )
+            row = await cursor.fetchone()
+
+            if row:
+                return AnalysisRecord(
+                    id=row['id'],
+                    file_id=row['file_id'],
+                    analysis_time=datetime.fromisoformat(row['analysis_time']),
+                    analysis_result=_decompress_result(row),
+                    result_file_path=row['result_file_path']
                 )
-                row = await cursor.fetchone()
-                
-                if row:
-                    return AnalysisRecord(
-                        id=row['id'],
-                        file_id=row['file_id'],
-                        analysis_time=datetime.fromisoformat(row['analysis_time']),
-                        analysis_result=row['analysis_result'],
-                        result_file_path=row['result_file_path']
-                    )
-                return None
+            return None
         except Exception as e:
             logger.error(f"获取分析记录失败: {e}")
             return None
@@ -426,28 +794,27 @@ class DatabaseManager:
             List[Dict]: 分析历史记录列表
         """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute(
-                     """
-                     SELECT * FROM analysis_records 
-                     WHERE file_id = ? 
-                     ORDER BY analysis_time DESC
-                     """,
-                     (file_id,)
-                 )
-                rows = await cursor.fetchall()
-                
-                return [
-                     {
-                         'id': row['id'],
-                         'file_id': row['file_id'],
-                         'analysis_time': row['analysis_time'],
-                         'analysis_result': row['analysis_result'],
-                         'result_file_path': row['result_file_path']
-                     }
-                     for row in rows
-                 ]
+            db = await self._get_connection()
+            cursor = await db.execute(
+                """
+                SELECT * FROM analysis_records 
+                WHERE file_id = ? 
+                ORDER BY analysis_time DESC
+                """,
+                (file_id,)
+            )
+            rows = await cursor.fetchall()
+
+            return [
+                {
+                    'id': row['id'],
+                    'file_id': row['file_id'],
+                    'analysis_time': row['analysis_time'],
+                    'analysis_result': _decompress_result(row),
+                    'result_file_path': row['result_file_path']
+                }
+                for row in rows
+            ]
         except Exception as e:
             logger.error(f"获取文件分析历史失败: {e}")
             return []
@@ -461,13 +828,19 @@ class DatabaseManager:
         Returns:
             bool: 删除是否成功
         """
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._transaction() as db:
             # 删除相关分析记录
             await db.execute("DELETE FROM analysis_records WHERE file_id = ?", (file_id,))
             # 删除文件记录
             cursor = await db.execute("DELETE FROM files WHERE id = ?", (file_id,))
-            await db.commit()
-            return cursor.rowcount > 0
+        self._evict_file_from_cache(file_id)
+        return cursor.rowcount > 0
+
+    def _evict_file_from_cache(self, file_id: int) -> None:
+        """从哈希缓存中移除指定ID的文件记录"""
+        stale = [key for key, record in self._hash_cache.items() if record.id == file_id]
+        for key in stale:
+            del self._hash_cache[key]
 
     async def delete_analysis_record(self, analysis_id: int) -> bool:
         """删除分析记录
@@ -479,12 +852,11 @@ class DatabaseManager:
             bool: 是否删除成功
         """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._transaction() as db:
                 await db.execute(
                     "DELETE FROM analysis_records WHERE id = ?",
                     (analysis_id,)
                 )
-                await db.commit()
                 return True
         except Exception as e:
             logger.error(f"删除分析记录失败: {e}")
@@ -7,41 +7,158 @@
 - 文件清理和维护
 """
 
-import json
+import asyncio
+import hashlib
+import os
+import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
+from typing import BinaryIO, Dict, Any, Iterator, Optional, Set, Tuple
 import logging
 
-
-class DateTimeEncoder(json.JSONEncoder):
-    """自定义JSON编码器，处理datetime对象"""
-    def default(self, o):
-        if isinstance(o, datetime):
-            return o.isoformat()
-        return super().default(o)
+from .utils import json_utils
+from .utils.json_utils import DateTimeEncoder  # noqa: F401  兼容原有的导入路径
 
 logger = logging.getLogger(__name__)
 
+
+def _dump_json_bytes(data: Any) -> bytes:
+    """将分析结果序列化为缩进的 UTF-8 JSON 字节"""
+    return json_utils.dumps(data, indent=True)
+
+
 # 存储目录配置
 BASE_DATA_DIR = Path("data")
 UPLOADS_DIR = BASE_DATA_DIR / "uploads"
+# 上传暂存目录：与上传目录位于同一文件系统，提交时 os.replace 为原子重命名
+UPLOAD_STAGING_DIR = UPLOADS_DIR / ".staging"
 ANALYSIS_RESULTS_DIR = BASE_DATA_DIR / "analysis_results"
 DATABASE_DIR = BASE_DATA_DIR / "database"
 
+# 上传流分块大小：边写盘边计算哈希
+_UPLOAD_CHUNK_SIZE = 1 << 20
+
+# 人类可读大小的单位表（1024 进制）
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
+
+def _write_atomic(file_path: Path, data: bytes) -> None:
+    """先写入临时文件再原子替换，避免读取方看到写了一半的文件
+
+    临时文件名带随机后缀，同一目标的并发写入互不覆盖对方的临时文件。
+    """
+    tmp_path = file_path.with_name(f"{file_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, 'xb') as f:
+            f.write(data)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _stream_to_file(file_stream: BinaryIO, target: Path) -> Tuple[str, int]:
+    """分块把上传流写入目标文件，同时更新 SHA256，数据只在内存中经过一次
+
+    Returns:
+        Tuple[str, int]: (SHA256哈希值, 文件大小)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(target, 'wb') as out:
+        while chunk := file_stream.read(_UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _write_json(file_path: Path, data: Any) -> None:
+    """序列化并原子写入 JSON 文件"""
+    _write_atomic(file_path, _dump_json_bytes(data))
+
+
+def _walk_files(root: Path) -> Iterator[Tuple[str, int, float]]:
+    """递归遍历目录下的普通文件（单次 os.scandir，stat 结果由 DirEntry 缓存）
+    
+    以点号开头的隐藏目录（如上传暂存目录）不计入统计。
+
+    Args:
+        root: 根目录
+
+    Yields:
+        Tuple[str, int, float]: (文件名, 文件大小, 修改时间)
+    """
+    try:
+        entries = os.scandir(root)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if not entry.name.startswith('.'):
+                    yield from _walk_files(Path(entry.path))
+            elif entry.is_file(follow_symlinks=False):
+                st = entry.stat(follow_symlinks=False)
+                yield entry.name, st.st_size, st.st_mtime
+
+
+def _scan_uploads(directory: Path) -> Dict[str, int]:
+    """单次遍历统计上传目录的文件数、总大小和各类型文件数"""
+    total_files = total_size = csv_files = parquet_files = 0
+    for name, size, _ in _walk_files(directory):
+        total_files += 1
+        total_size += size
+        if name.endswith('.csv'):
+            csv_files += 1
+        elif name.endswith('.parquet'):
+            parquet_files += 1
+    return {
+        'total_files': total_files,
+        'total_size_bytes': total_size,
+        'csv_files': csv_files,
+        'parquet_files': parquet_files
+    }
+
+
+def _scan_analysis_results(directory: Path) -> Dict[str, int]:
+    """单次遍历统计分析结果目录的结果文件数和总大小"""
+    total_results = total_size = 0
+    for name, size, _ in _walk_files(directory):
+        total_size += size
+        if name.endswith('.json'):
+            total_results += 1
+    return {
+        'total_results': total_results,
+        'total_size_bytes': total_size
+    }
+
+
+def _dir_size(directory: Path) -> int:
+    """目录下所有文件的总大小"""
+    return sum(size for _, size, _ in _walk_files(directory))
+
 
 class FileStorageManager:
     """文件存储管理器"""
 
     def __init__(self):
+        # 已确认存在的目录，避免每次保存都重复 mkdir
+        self._ensured_dirs: Set[Path] = set()
         self._ensure_directories()
 
     def _ensure_directories(self) -> None:
         """确保所有必要的目录存在"""
-        for directory in [UPLOADS_DIR, ANALYSIS_RESULTS_DIR, DATABASE_DIR]:
-            directory.mkdir(parents=True, exist_ok=True)
+        for directory in [UPLOADS_DIR, UPLOAD_STAGING_DIR, ANALYSIS_RESULTS_DIR, DATABASE_DIR]:
+            self._ensure_dir(directory)
             logger.debug(f"确保目录存在: {directory}")
 
+    def _ensure_dir(self, directory: Path) -> None:
+        """创建目录（同一进程内每个目录只实际 mkdir 一次）"""
+        if directory not in self._ensured_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._ensured_dirs.add(directory)
+
     def get_file_storage_path(self, file_hash: str, file_extension: str) -> Path:
         """获取文件存储路径
         
@@ -56,7 +173,7 @@ class FileStorageManager:
         """
         now = datetime.now()
         year_month_dir = UPLOADS_DIR / str(now.year) / f"{now.month:02d}"
-        year_month_dir.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(year_month_dir)
         
         filename = f"{file_hash}{file_extension}"
         return year_month_dir / filename
@@ -72,17 +189,40 @@ class FileStorageManager:
         """
         now = datetime.now()
         year_month_dir = ANALYSIS_RESULTS_DIR / str(now.year) / f"{now.month:02d}"
-        year_month_dir.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(year_month_dir)
         
         filename = f"analysis_{analysis_id}.json"
         return year_month_dir / filename
 
-    async def save_uploaded_file(self, file_content: bytes, file_hash: str, 
-                               file_extension: str) -> Path:
-        """保存上传的文件
+    async def stage_uploaded_stream(self, file_stream: BinaryIO) -> Tuple[Path, str, int]:
+        """将上传流写入暂存文件，写入的同时计算哈希
+        
+        无需先把整个文件读入内存再单独计算哈希；确定最终路径后调用
+        commit_staged_upload 落盘，或调用 discard_staged_upload 丢弃。
+        
+        Args:
+            file_stream: 上传文件的二进制流
+            
+        Returns:
+            Tuple[Path, str, int]: (暂存文件路径, SHA256哈希值, 文件大小)
+        """
+        self._ensure_dir(UPLOAD_STAGING_DIR)
+        staged_path = UPLOAD_STAGING_DIR / f"upload-{uuid.uuid4().hex}.tmp"
+        try:
+            file_hash, file_size = await asyncio.to_thread(
+                _stream_to_file, file_stream, staged_path
+            )
+        except Exception:
+            staged_path.unlink(missing_ok=True)
+            raise
+        return staged_path, file_hash, file_size
+
+    async def commit_staged_upload(self, staged_path: Path, file_hash: str,
+                                   file_extension: str) -> Path:
+        """将暂存文件移动到按哈希命名的存储路径
         
         Args:
-            file_content: 文件内容
+            staged_path: stage_uploaded_stream 返回的暂存文件路径
             file_hash: 文件哈希值
             file_extension: 文件扩展名
             
@@ -91,18 +231,24 @@ class FileStorageManager:
         """
         file_path = self.get_file_storage_path(file_hash, file_extension)
         
-        # 如果文件已存在，直接返回路径
+        # 如果文件已存在，丢弃暂存文件直接返回路径
         if file_path.exists():
             logger.info(f"文件已存在，跳过保存: {file_path}")
+            staged_path.unlink(missing_ok=True)
             return file_path
         
-        # 保存文件
-        with open(file_path, 'wb') as f:
-            f.write(file_content)
-        
+        os.replace(staged_path, file_path)
         logger.info(f"文件保存成功: {file_path}")
         return file_path
 
+    def discard_staged_upload(self, staged_path: Path) -> None:
+        """删除暂存文件（已提交时为空操作）
+        
+        Args:
+            staged_path: 暂存文件路径
+        """
+        staged_path.unlink(missing_ok=True)
+
     async def save_analysis_result(self, analysis_result: Dict[str, Any], 
                                  analysis_id: int) -> Path:
         """保存分析结果
@@ -116,9 +262,8 @@ class FileStorageManager:
         """
         result_path = self.get_analysis_result_path(analysis_id)
         
-        # 保存为JSON格式
-        with open(result_path, 'w', encoding='utf-8') as f:
-            json.dump(analysis_result, f, ensure_ascii=False, indent=2, cls=DateTimeEncoder)
+        # 保存为JSON格式（序列化与写盘都放到线程中执行）
+        await asyncio.to_thread(_write_json, result_path, analysis_result)
         
         logger.info(f"分析结果保存成功: {result_path}")
         # 返回使用正斜杠的标准化路径字符串，确保跨平台兼容性
@@ -146,8 +291,8 @@ class FileStorageManager:
                 logger.warning(f"分析结果文件不存在: {result_path}")
                 return None
             
-            with open(result_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(result_path, 'rb') as f:
+                return json_utils.loads(f.read())
         except Exception as e:
             logger.error(f"加载分析结果失败: {e}")
             return None
@@ -199,82 +344,102 @@ class FileStorageManager:
         cutoff_time = datetime.now() - timedelta(days=days_old)
         cutoff_timestamp = cutoff_time.timestamp()
         
-        files_cleaned = 0
-        results_cleaned = 0
-        
-        # 清理上传文件
-        for file_path in UPLOADS_DIR.rglob("*"):
-            if file_path.is_file() and file_path.stat().st_mtime < cutoff_timestamp:
-                try:
-                    file_path.unlink()
-                    files_cleaned += 1
-                    logger.debug(f"清理文件: {file_path}")
-                except Exception as e:
-                    logger.error(f"清理文件失败 {file_path}: {e}")
-        
-        # 清理分析结果
-        for result_path in ANALYSIS_RESULTS_DIR.rglob("*.json"):
-            if result_path.is_file() and result_path.stat().st_mtime < cutoff_timestamp:
-                try:
-                    result_path.unlink()
-                    results_cleaned += 1
-                    logger.debug(f"清理分析结果: {result_path}")
-                except Exception as e:
-                    logger.error(f"清理分析结果失败 {result_path}: {e}")
-        
-        # 清理空目录
-        self._cleanup_empty_directories(UPLOADS_DIR)
-        self._cleanup_empty_directories(ANALYSIS_RESULTS_DIR)
+        # 每个目录一次 os.scandir 递归：删除过期文件，回溯时顺带删除已清空的子目录
+        files_cleaned, _ = self._cull_directory(UPLOADS_DIR, cutoff_timestamp)
+        results_cleaned, _ = self._cull_directory(ANALYSIS_RESULTS_DIR, cutoff_timestamp, '.json')
         
         logger.info(f"清理完成: {files_cleaned} 个文件, {results_cleaned} 个分析结果")
         return files_cleaned, results_cleaned
 
-    def _cleanup_empty_directories(self, base_dir: Path) -> None:
-        """清理空目录
+    def _cull_directory(self, directory: Path, cutoff_timestamp: float,
+                        suffix: Optional[str] = None) -> Tuple[int, int]:
+        """递归删除目录下修改时间早于截止时间的文件，并删除清理后为空的子目录
+        
+        子目录是否为空由递归返回的剩余条目数判断，无需重新读取目录。
         
         Args:
-            base_dir: 基础目录
+            directory: 目录
+            cutoff_timestamp: 截止时间戳
+            suffix: 只清理该后缀的文件，None 表示全部文件
+            
+        Returns:
+            Tuple[int, int]: (删除的文件数, 目录中剩余的条目数)
         """
-        for dir_path in sorted(base_dir.rglob("*"), reverse=True):
-            if dir_path.is_dir() and dir_path != base_dir:
-                try:
-                    if not any(dir_path.iterdir()):
-                        dir_path.rmdir()
-                        logger.debug(f"清理空目录: {dir_path}")
-                except Exception as e:
-                    logger.debug(f"清理空目录失败 {dir_path}: {e}")
-
-    def get_storage_stats(self) -> Dict[str, Any]:
+        cleaned = 0
+        remaining = 0
+        try:
+            entries = os.scandir(directory)
+        except OSError as e:
+            logger.error(f"读取目录失败 {directory}: {e}")
+            return 0, 1
+
+        with entries:
+            for entry in entries:
+                entry_path = Path(entry.path)
+                if entry.is_dir(follow_symlinks=False):
+                    sub_cleaned, sub_remaining = self._cull_directory(
+                        entry_path, cutoff_timestamp, suffix
+                    )
+                    cleaned += sub_cleaned
+                    # 暂存目录中过期的残留文件照常清理，目录本身保留
+                    if sub_remaining == 0 and entry_path != UPLOAD_STAGING_DIR:
+                        try:
+                            entry_path.rmdir()
+                            self._ensured_dirs.discard(entry_path)
+                            logger.debug(f"清理空目录: {entry_path}")
+                            continue
+                        except OSError as e:
+                            logger.debug(f"清理空目录失败 {entry_path}: {e}")
+                elif (
+                    entry.is_file()
+                    and (suffix is None or entry.name.endswith(suffix))
+                    and entry.stat().st_mtime < cutoff_timestamp
+                ):
+                    try:
+                        entry_path.unlink()
+                        cleaned += 1
+                        logger.debug(f"清理文件: {entry_path}")
+                        continue
+                    except OSError as e:
+                        logger.error(f"清理文件失败 {entry_path}: {e}")
+                remaining += 1
+
+        return cleaned, remaining
+
+    async def get_storage_stats(self, file_stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """获取存储统计信息
         
+        Args:
+            file_stats: DatabaseManager.get_file_stats() 的结果；提供时上传文件与分析结果的
+                统计直接取自数据库，只需遍历数据库目录（未提供时全部扫描文件系统）
+        
         Returns:
             Dict: 存储统计信息
         """
-        def get_dir_size(directory: Path) -> int:
-            """计算目录大小"""
-            total_size = 0
-            for file_path in directory.rglob("*"):
-                if file_path.is_file():
-                    total_size += file_path.stat().st_size
-            return total_size
-        
-        def count_files(directory: Path, pattern: str = "*") -> int:
-            """计算文件数量"""
-            return len(list(directory.rglob(pattern)))
-        
+        if file_stats is not None:
+            file_types = file_stats['file_types']
+            uploads = {
+                'total_files': sum(item['count'] for item in file_types.values()),
+                'total_size_bytes': sum(item['size_bytes'] for item in file_types.values()),
+                'csv_files': file_types.get('csv', {}).get('count', 0),
+                'parquet_files': file_types.get('parquet', {}).get('count', 0)
+            }
+            # 结果文件大小在保存时已写入分析记录
+            analysis_results = dict(file_stats['analysis_results'])
+            db_size = await asyncio.to_thread(_dir_size, DATABASE_DIR)
+        else:
+            # 三个目录的遍历互不依赖，放到线程池中并发执行
+            uploads, analysis_results, db_size = await asyncio.gather(
+                asyncio.to_thread(_scan_uploads, UPLOADS_DIR),
+                asyncio.to_thread(_scan_analysis_results, ANALYSIS_RESULTS_DIR),
+                asyncio.to_thread(_dir_size, DATABASE_DIR)
+            )
+
         stats: Dict[str, Any] = {
-            'uploads': {
-                'total_files': count_files(UPLOADS_DIR),
-                'total_size_bytes': get_dir_size(UPLOADS_DIR),
-                'csv_files': count_files(UPLOADS_DIR, "*.csv"),
-                'parquet_files': count_files(UPLOADS_DIR, "*.parquet")
-            },
-            'analysis_results': {
-                'total_results': count_files(ANALYSIS_RESULTS_DIR, "*.json"),
-                'total_size_bytes': get_dir_size(ANALYSIS_RESULTS_DIR)
-            },
+            'uploads': uploads,
+            'analysis_results': analysis_results,
             'database': {
-                'db_size_bytes': int(DATABASE_DIR.stat().st_size) if DATABASE_DIR.exists() else 0
+                'db_size_bytes': db_size
             }
         }
         
@@ -297,12 +462,12 @@ class FileStorageManager:
         Returns:
             str: 格式化后的大小字符串
         """
-        size_float = float(bytes_size)
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if size_float < 1024.0:
-                return f"{size_float:.1f} {unit}"
-            size_float /= 1024.0
-        return f"{size_float:.1f} PB"
+        bytes_size = int(bytes_size)
+        if bytes_size <= 0:
+            return f"{float(bytes_size):.1f} B"
+        # 每 10 个二进制位对应一级单位，直接查表
+        unit_index = min(len(_SIZE_UNITS) - 1, (bytes_size.bit_length() - 1) // 10)
+        return f"{bytes_size / (1 << (10 * unit_index)):.1f} {_SIZE_UNITS[unit_index]}"
 
 
 # 全局文件存储管理器实例
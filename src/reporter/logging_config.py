@@ -8,19 +8,25 @@
 - 运行状态监控
 """
 
+import atexit
 import logging
 import logging.config
+import logging.handlers
 import json
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass
 import os
+import queue
 import threading
 
+from .utils import json_utils
+from .utils.ttl_cache import OPEN_FILES_TTL, TTLCache
 
-@dataclass
+
+@dataclass(slots=True)
 class LogEntry:
     """日志条目数据结构"""
     timestamp: str
@@ -34,6 +40,41 @@ class LogEntry:
     error_type: Optional[str] = None
     error_details: Optional[str] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（直接读取字段，避免 asdict 的递归深拷贝；省略为 None 的可选字段）"""
+        data = {
+            "timestamp": self.timestamp,
+            "level": self.level,
+            "message": self.message,
+            "operation": self.operation,
+        }
+        if self.duration is not None:
+            data["duration"] = self.duration
+        if self.memory_usage is not None:
+            data["memory_usage"] = self.memory_usage
+        if self.file_size is not None:
+            data["file_size"] = self.file_size
+        if self.rows_processed is not None:
+            data["rows_processed"] = self.rows_processed
+        if self.error_type is not None:
+            data["error_type"] = self.error_type
+        if self.error_details is not None:
+            data["error_details"] = self.error_details
+        return data
+
+
+def _dumps(data: Any) -> str:
+    """序列化日志数据为 JSON 字符串"""
+    return json_utils.dumps(data).decode()
+
+
+# 无附加字段时的预编译日志模板，键顺序与 LogEntry.to_dict 一致；
+# 字符串参数须先经 _dumps 转义，时间戳为 ISO 格式无需转义
+_ENTRY_TEMPLATE = '{"timestamp":"%s","level":"%s","message":%s,"operation":%s}'
+_TIMED_ENTRY_TEMPLATE = (
+    '{"timestamp":"%s","level":"%s","message":%s,"operation":%s,"duration":%r}'
+)
+
 
 class PerformanceLogger:
     """性能日志记录器"""
@@ -45,9 +86,25 @@ class PerformanceLogger:
         # 配置日志
         self.setup_logging()
         
-        # 性能指标存储
-        self.metrics = []
-        self._lock = threading.Lock()
+        # 性能指标按线程分片，每个分片按操作名维护累计值（count/total/min/max，单位纳秒），
+        # 避免所有写入争用同一把锁，也无需保留全部历史记录
+        shard_count = os.cpu_count() or 1
+        self._shards: List[Dict[str, Dict[str, int]]] = [{} for _ in range(shard_count)]
+        self._shard_locks = [threading.Lock() for _ in range(shard_count)]
+        
+        # 缓存最近一次格式化的时间戳，(ISO 字符串, 生成时刻)
+        self._ts_cache = ("", 0.0)
+    
+    def _now_iso(self) -> str:
+        """返回当前时间的 ISO 字符串，1ms 内的连续调用复用缓存结果"""
+        t = time.time()
+        cached, cached_at = self._ts_cache
+        if 0.0 <= t - cached_at < 0.001:
+            return cached
+        # 不加锁：并发下读到稍旧的时间戳对日志可以接受
+        iso = datetime.fromtimestamp(t).isoformat()
+        self._ts_cache = (iso, t)
+        return iso
     
     def setup_logging(self):
         """设置日志配置"""
@@ -59,7 +116,8 @@ class PerformanceLogger:
                     "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
                 },
                 "json": {
-                    "format": "%(asctime)s %(levelname)s %(name)s %(message)s"
+                    # 消息本身已是完整 JSON（含时间戳与级别），每行输出一条 JSON Lines 记录
+                    "format": "%(message)s"
                 }
             },
             "handlers": {
@@ -98,53 +156,113 @@ class PerformanceLogger:
             }
         }
         
+        # 重新配置会关闭现有处理器，先停掉旧的监听线程把队列写完
+        previous = getattr(self, "_listeners", None)
+        if previous is not None:
+            self._stop_queue_listeners()
+        
         logging.config.dictConfig(log_config)
         self.logger = logging.getLogger(__name__)
         self.performance_logger = logging.getLogger("performance")
+        self._start_queue_listeners()
+        if previous is None:
+            # 退出前排空队列，保证已入队的日志落盘
+            atexit.register(self._stop_queue_listeners)
     
-    def log_operation_start(self, operation: str, **kwargs) -> float:
-        """记录操作开始"""
-        start_time = time.time()
-        
-        entry = LogEntry(
-            timestamp=datetime.now().isoformat(),
-            level="INFO",
-            message=f"Starting {operation}",
-            operation=operation,
-            **kwargs
-        )
+    def _start_queue_listeners(self):
+        """将各日志器的处理器移到后台线程，调用方只需入队"""
+        self._listeners = []
+        # 根日志器和性能日志器的处理器不同，各自使用独立的队列与监听线程
+        for target in (logging.getLogger(), self.performance_logger):
+            handlers = [
+                handler for handler in target.handlers
+                if not isinstance(handler, logging.handlers.QueueHandler)
+            ]
+            for handler in list(target.handlers):
+                target.removeHandler(handler)
+            
+            log_queue = queue.SimpleQueue()
+            target.addHandler(logging.handlers.QueueHandler(log_queue))
+            listener = logging.handlers.QueueListener(
+                log_queue, *handlers, respect_handler_level=True
+            )
+            listener.start()
+            self._listeners.append(listener)
+    
+    def _stop_queue_listeners(self):
+        """停止后台日志线程并写完剩余日志"""
+        listeners, self._listeners = self._listeners, []
+        for listener in listeners:
+            listener.stop()
+    
+    def log_operation_start(self, operation: str, **kwargs) -> int:
+        """记录操作开始，返回 perf_counter_ns 起始时刻"""
+        start_time = time.perf_counter_ns()
         
-        self.logger.info(json.dumps(asdict(entry)))
+        # 级别被过滤时不构造日志条目，避免无谓的序列化开销
+        if self.logger.isEnabledFor(logging.INFO):
+            if kwargs:
+                entry = LogEntry(
+                    timestamp=self._now_iso(),
+                    level="INFO",
+                    message=f"Starting {operation}",
+                    operation=operation,
+                    **kwargs
+                )
+                self.logger.info(_dumps(entry.to_dict()))
+            else:
+                op_json = _dumps(operation)
+                self.logger.info(_ENTRY_TEMPLATE % (
+                    self._now_iso(), "INFO", '"Starting ' + op_json[1:], op_json
+                ))
         return start_time
     
-    def log_operation_end(self, operation: str, start_time: float, **kwargs) -> None:
+    def log_operation_end(self, operation: str, start_time: int, **kwargs) -> None:
         """记录操作结束"""
-        duration = time.time() - start_time
+        duration_ns = time.perf_counter_ns() - start_time
         
-        entry = LogEntry(
-            timestamp=datetime.now().isoformat(),
-            level="INFO",
-            message=f"Completed {operation}",
-            operation=operation,
-            duration=duration,
-            **kwargs
-        )
-        
-        self.performance_logger.info(json.dumps(asdict(entry)))
+        if self.performance_logger.isEnabledFor(logging.INFO):
+            if kwargs:
+                entry = LogEntry(
+                    timestamp=self._now_iso(),
+                    level="INFO",
+                    message=f"Completed {operation}",
+                    operation=operation,
+                    duration=duration_ns / 1e9,
+                    **kwargs
+                )
+                self.performance_logger.info(_dumps(entry.to_dict()))
+            else:
+                op_json = _dumps(operation)
+                self.performance_logger.info(_TIMED_ENTRY_TEMPLATE % (
+                    self._now_iso(), "INFO", '"Completed ' + op_json[1:], op_json,
+                    duration_ns / 1e9,
+                ))
         
         # 记录性能指标
-        with self._lock:
-            self.metrics.append({
-                "operation": operation,
-                "duration": duration,
-                "timestamp": datetime.now().isoformat(),
-                **kwargs
-            })
+        # get_ident 为按栈大小对齐的地址，取模会集中到同一分片，改用连续的系统线程号
+        i = threading.get_native_id() % len(self._shards)
+        with self._shard_locks[i]:
+            agg = self._shards[i].get(operation)
+            if agg is None:
+                self._shards[i][operation] = {
+                    "count": 1,
+                    "total": duration_ns,
+                    "min": duration_ns,
+                    "max": duration_ns,
+                }
+            else:
+                agg["count"] += 1
+                agg["total"] += duration_ns
+                if duration_ns < agg["min"]:
+                    agg["min"] = duration_ns
+                if duration_ns > agg["max"]:
+                    agg["max"] = duration_ns
     
     def log_error(self, operation: str, error: Exception, **kwargs) -> None:
         """记录错误"""
         entry = LogEntry(
-            timestamp=datetime.now().isoformat(),
+            timestamp=self._now_iso(),
             level="ERROR",
             message=str(error),
             operation=operation,
@@ -153,98 +271,153 @@ class PerformanceLogger:
             **kwargs
         )
         
-        self.logger.error(json.dumps(asdict(entry)))
+        self.logger.error(_dumps(entry.to_dict()))
     
     def log_warning(self, operation: str, message: str, **kwargs) -> None:
         """记录警告"""
-        entry = LogEntry(
-            timestamp=datetime.now().isoformat(),
-            level="WARNING",
-            message=message,
-            operation=operation,
-            **kwargs
-        )
+        if not self.logger.isEnabledFor(logging.WARNING):
+            return
         
-        self.logger.warning(json.dumps(asdict(entry)))
+        if kwargs:
+            entry = LogEntry(
+                timestamp=self._now_iso(),
+                level="WARNING",
+                message=message,
+                operation=operation,
+                **kwargs
+            )
+            self.logger.warning(_dumps(entry.to_dict()))
+        else:
+            self.logger.warning(_ENTRY_TEMPLATE % (
+                self._now_iso(), "WARNING", _dumps(message), _dumps(operation)
+            ))
     
     def get_performance_summary(self) -> Dict[str, Any]:
         """获取性能摘要"""
+        merged: Dict[str, Dict[str, int]] = {}
+        for shard, lock in zip(self._shards, self._shard_locks):
+            with lock:
+                for op, agg in shard.items():
+                    total = merged.get(op)
+                    if total is None:
+                        merged[op] = dict(agg)
+                    else:
+                        total["count"] += agg["count"]
+                        total["total"] += agg["total"]
+                        total["min"] = min(total["min"], agg["min"])
+                        total["max"] = max(total["max"], agg["max"])
+        
+        return {
+            op: {
+                "count": agg["count"],
+                "total_time": agg["total"] / 1e9,
+                "avg_time": agg["total"] / agg["count"] / 1e9,
+                "min_time": agg["min"] / 1e9,
+                "max_time": agg["max"] / 1e9,
+            }
+            for op, agg in merged.items()
+        }
+
+
+class _LockedCounter:
+    """加锁保护的计数器
+    
+    `+=` 并非原子操作，itertools.count 又无法在不推进计数的情况下读取当前值，
+    因此自增和读取都在锁内完成；临界区只有一次整数运算，争用开销可以忽略。
+    """
+    
+    __slots__ = ("_value", "_lock")
+    
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+    
+    def increment(self) -> None:
         with self._lock:
-            if not self.metrics:
-                return {}
-            
-            operations = {}
-            for metric in self.metrics:
-                op = metric["operation"]
-                if op not in operations:
-                    operations[op] = []
-                operations[op].append(metric)
-            
-            summary = {}
-            for op, metrics in operations.items():
-                durations = [m["duration"] for m in metrics]
-                summary[op] = {
-                    "count": len(metrics),
-                    "total_time": sum(durations),
-                    "avg_time": sum(durations) / len(durations),
-                    "min_time": min(durations),
-                    "max_time": max(durations),
-                }
-            
-            return summary
+            self._value += 1
+    
+    @property
+    def value(self) -> int:
+        with self._lock:
+            return self._value
 
 
 class MetricsCollector:
     """指标收集器"""
     
     def __init__(self):
-        self.metrics = {
-            "files_processed": 0,
-            "total_rows_processed": 0,
-            "total_columns_processed": 0,
-            "errors": 0,
-            "warnings": 0,
-            "processing_times": [],
-            "memory_usage": [],
-        }
+        self._files_processed = _LockedCounter()
+        self._errors = _LockedCounter()
+        self._warnings = _LockedCounter()
+        # 每个线程独立的缓冲区，热路径上无需加锁，读取时再合并
+        self._local = threading.local()
+        self._buffers = []
         self._lock = threading.Lock()
     
+    def _thread_buffer(self) -> Dict[str, Any]:
+        """获取当前线程的指标缓冲区，首次使用时注册"""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = {
+                "total_rows_processed": 0,
+                "total_columns_processed": 0,
+                "processing_times": [],
+                "memory_usage": [],
+            }
+            self._local.buffer = buffer
+            with self._lock:
+                self._buffers.append(buffer)
+        return buffer
+    
     def record_file_processed(self, filename: str, rows: int, cols: int, duration: float, memory_mb: float):
         """记录文件处理"""
-        with self._lock:
-            self.metrics["files_processed"] += 1
-            self.metrics["total_rows_processed"] += rows
-            self.metrics["total_columns_processed"] += cols
-            self.metrics["processing_times"].append(duration)
-            self.metrics["memory_usage"].append(memory_mb)
+        buffer = self._thread_buffer()
+        buffer["total_rows_processed"] += rows
+        buffer["total_columns_processed"] += cols
+        buffer["processing_times"].append(duration)
+        buffer["memory_usage"].append(memory_mb)
+        self._files_processed.increment()
     
     def record_error(self):
         """记录错误"""
-        with self._lock:
-            self.metrics["errors"] += 1
+        self._errors.increment()
     
     def record_warning(self):
         """记录警告"""
-        with self._lock:
-            self.metrics["warnings"] += 1
+        self._warnings.increment()
     
     def get_metrics(self) -> Dict[str, Any]:
         """获取指标"""
+        metrics_copy = {
+            "files_processed": self._files_processed.value,
+            "total_rows_processed": 0,
+            "total_columns_processed": 0,
+            "errors": self._errors.value,
+            "warnings": self._warnings.value,
+            "processing_times": [],
+            "memory_usage": [],
+        }
+        
         with self._lock:
-            metrics_copy = self.metrics.copy()
-            
-            if metrics_copy["processing_times"]:
-                times = metrics_copy["processing_times"]
-                metrics_copy["avg_processing_time"] = sum(times) / len(times)
-                metrics_copy["min_processing_time"] = min(times)
-                metrics_copy["max_processing_time"] = max(times)
-            
-            if metrics_copy["memory_usage"]:
-                memory = metrics_copy["memory_usage"]
-                metrics_copy["avg_memory_usage"] = sum(memory) / len(memory)
-                metrics_copy["max_memory_usage"] = max(memory)
-            
-            return metrics_copy
+            buffers = list(self._buffers)
+        for buffer in buffers:
+            metrics_copy["total_rows_processed"] += buffer["total_rows_processed"]
+            metrics_copy["total_columns_processed"] += buffer["total_columns_processed"]
+            metrics_copy["processing_times"].extend(buffer["processing_times"])
+            metrics_copy["memory_usage"].extend(buffer["memory_usage"])
+        
+        if metrics_copy["processing_times"]:
+            times = metrics_copy["processing_times"]
+            metrics_copy["avg_processing_time"] = sum(times) / len(times)
+            metrics_copy["min_processing_time"] = min(times)
+            metrics_copy["max_processing_time"] = max(times)
+        
+        if metrics_copy["memory_usage"]:
+            memory = metrics_copy["memory_usage"]
+            metrics_copy["avg_memory_usage"] = sum(memory) / len(memory)
+            metrics_copy["max_memory_usage"] = max(memory)
+        
+        return metrics_copy
     
     def save_metrics(self, filename: str = None) -> str:
         """保存指标到文件"""
@@ -265,21 +438,29 @@ class MetricsCollector:
 class HealthChecker:
     """健康检查器"""
     
-    def __init__(self):
+    def __init__(self, cache_ttl: float = 1.0):
         self.start_time = datetime.now()
+        self._cache = TTLCache(cache_ttl)
+        
+        # 预热 CPU 采样，之后的非阻塞调用返回距上次调用的占用率
+        try:
+            import psutil
+            psutil.cpu_percent(interval=None)
+        except ImportError:
+            pass
     
     def get_health_status(self) -> Dict[str, Any]:
         """获取健康状态"""
         import psutil
         
         # 系统信息
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage("/")
+        cpu_percent = psutil.cpu_percent(interval=None)
+        memory = self._cache.get("virtual_memory", psutil.virtual_memory)
+        disk = self._cache.get("disk_usage", lambda: psutil.disk_usage("/"))
         
         # 进程信息
         process = psutil.Process()
-        memory_info = process.memory_info()
+        memory_info = self._cache.get("memory_info", process.memory_info)
         
         uptime = datetime.now() - self.start_time
         
@@ -297,7 +478,9 @@ class HealthChecker:
                 "memory_rss_mb": memory_info.rss / 1024 / 1024,
                 "memory_percent": process.memory_percent(),
                 "threads": process.num_threads(),
-                "open_files": len(process.open_files()),
+                "open_files": self._cache.get(
+                    "open_files", lambda: len(process.open_files()), OPEN_FILES_TTL
+                ),
             }
         }
 
@@ -332,18 +515,17 @@ def log_performance(func):
     def wrapper(*args, **kwargs):
         operation_name = func.__name__
         
-        # 记录开始
-        start_time = performance_logger.log_operation_start(operation_name)
+        # 记录开始；日志级别关闭时只取起始时间，跳过格式化
+        if performance_logger.logger.isEnabledFor(logging.INFO):
+            start_time = performance_logger.log_operation_start(operation_name)
+        else:
+            start_time = time.perf_counter_ns()
         
         try:
             result = func(*args, **kwargs)
             
             # 记录成功结束
-            performance_logger.log_operation_end(
-                operation_name, 
-                start_time,
-                memory_usage=0  # 可以添加内存使用
-            )
+            performance_logger.log_operation_end(operation_name, start_time)
             
             return result
             
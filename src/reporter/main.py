@@ -13,10 +13,12 @@ import argparse
 import logging
 import asyncio
 from pathlib import Path
+from typing import Optional
 
 from .config import get_settings, config_manager
 from .tasks.task_manager import TaskManager
 from .logging_config import setup_logging
+from .utils import json_utils
 
 
 def setup_application() -> None:
@@ -37,11 +39,14 @@ def setup_application() -> None:
         sys.exit(1)
 
 
-def parse_arguments() -> argparse.Namespace:
-    """解析命令行参数
+_PARSER: Optional[argparse.ArgumentParser] = None
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器
     
     Returns:
-        解析后的参数
+        参数解析器
     """
     parser = argparse.ArgumentParser(
         description="数据报告生成器",
@@ -173,7 +178,24 @@ def parse_arguments() -> argparse.Namespace:
         version="%(prog)s 1.0.0"
     )
     
-    return parser.parse_args()
+    return parser
+
+
+def _get_parser() -> argparse.ArgumentParser:
+    """获取参数解析器，首次调用时构建并复用"""
+    global _PARSER
+    if _PARSER is None:
+        _PARSER = _build_parser()
+    return _PARSER
+
+
+def parse_arguments() -> argparse.Namespace:
+    """解析命令行参数
+    
+    Returns:
+        解析后的参数
+    """
+    return _get_parser().parse_args()
 
 
 def validate_arguments(args: argparse.Namespace) -> bool:
@@ -346,11 +368,7 @@ async def run_analysis(args: argparse.Namespace) -> bool:
         )
         
         # 等待任务完成
-        while True:
-            task_info = await task_manager.get_task_info(task_id)
-            if task_info and task_info.status.value in ['completed', 'failed', 'cancelled']:
-                break
-            await asyncio.sleep(1)
+        task_info = await task_manager.wait_for(task_id)
         
         if task_info.status.value != 'completed':
             logger.error(f"数据分析失败: {task_info.error_message}")
@@ -372,9 +390,8 @@ async def run_analysis(args: argparse.Namespace) -> bool:
             output_path = f"{input_path.stem}_analysis_{timestamp}.{args.format}"
         
         # 简单保存结果
-        import json
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        with open(output_path, 'wb') as f:
+            f.write(json_utils.dumps(results, indent=True))
         
         logger.info(f"结果已保存到: {output_path}")
         
@@ -9,14 +9,23 @@
 """
 
 import gc
+import numpy as np
 import psutil
 import os
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from contextlib import contextmanager
 import threading
 import time
 
+from .utils.ttl_cache import OPEN_FILES_TTL, TTLCache
+
+
+# 内存使用历史环形缓冲区容量
+_HISTORY_CAPACITY = 1024
+# 内存读数缓存时间（秒）
+_MEMORY_CACHE_TTL = 0.05
+
 
 class MemoryManager:
     """内存管理器"""
@@ -31,22 +40,39 @@ class MemoryManager:
         self.max_memory_mb = max_memory_mb
         self.process = psutil.Process(os.getpid())
         self._lock = threading.Lock()
-        self._memory_usage_history = []
+        # 预分配的环形缓冲区记录 RSS（MB），_buf_idx 为累计写入次数
+        self._mem_buf = np.empty(_HISTORY_CAPACITY, dtype=np.float32)
+        self._buf_idx = 0
+        self._x = np.arange(_HISTORY_CAPACITY, dtype=np.float64)
+        # 最近一次内存读数及其时刻，供连续调用复用
+        self._mem_cache: Tuple[Optional[Dict[str, float]], float] = (None, 0.0)
+        
+    def get_memory_usage(self, fresh: bool = False) -> Dict[str, float]:
+        """获取当前内存使用情况
+        
+        Args:
+            fresh: 为 True 时跳过短时缓存，强制重新读取
+        """
+        now = time.monotonic()
+        cached, cached_at = self._mem_cache
+        if not fresh and cached is not None and now - cached_at < _MEMORY_CACHE_TTL:
+            return dict(cached)
         
-    def get_memory_usage(self) -> Dict[str, float]:
-        """获取当前内存使用情况"""
         memory_info = self.process.memory_info()
-        return {
+        virtual_memory = psutil.virtual_memory()
+        usage = {
             "rss_mb": memory_info.rss / 1024 / 1024,
             "vms_mb": memory_info.vms / 1024 / 1024,
-            "percent": self.process.memory_percent(),
-            "available_mb": psutil.virtual_memory().available / 1024 / 1024,
-            "total_mb": psutil.virtual_memory().total / 1024 / 1024,
+            "percent": memory_info.rss / virtual_memory.total * 100,
+            "available_mb": virtual_memory.available / 1024 / 1024,
+            "total_mb": virtual_memory.total / 1024 / 1024,
         }
+        self._mem_cache = (usage, now)
+        return dict(usage)
     
     def check_memory_limit(self) -> bool:
         """检查是否超过内存限制"""
-        current_usage = self.get_memory_usage()
+        current_usage = self.get_memory_usage(fresh=True)
         return current_usage["rss_mb"] <= self.max_memory_mb
     
     def force_garbage_collection(self) -> None:
@@ -63,62 +89,62 @@ class MemoryManager:
         
         # 记录历史
         with self._lock:
-            self._memory_usage_history.append({
-                "timestamp": time.time(),
-                "operation": operation,
-                "memory_mb": memory_info["rss_mb"]
-            })
+            self._mem_buf[self._buf_idx % _HISTORY_CAPACITY] = memory_info["rss_mb"]
+            self._buf_idx += 1
     
     def cleanup_large_objects(self) -> None:
         """清理大对象"""
-        gc.collect()
-        
-        # 强制清理未引用的对象
-        for _ in range(3):
-            gc.collect()
-            time.sleep(0.1)
+        # gc.collect 返回时回收已经完成，一次完整的第 2 代回收即可
+        gc.collect(2)
     
     def get_memory_trend(self, last_n: int = 10) -> Optional[Dict[str, float]]:
         """获取内存使用趋势"""
+        if last_n < 2 or last_n > _HISTORY_CAPACITY:
+            return None
+        
         with self._lock:
-            if len(self._memory_usage_history) < last_n:
-                return None
-            
-            recent_data = self._memory_usage_history[-last_n:]
-            memory_values = [d["memory_mb"] for d in recent_data]
-            
-            if len(memory_values) < 2:
+            if self._buf_idx < last_n:
                 return None
             
-            # 计算趋势
-            import numpy as np
-            x = np.arange(len(memory_values))
-            y = np.array(memory_values)
+            start = (self._buf_idx - last_n) % _HISTORY_CAPACITY
+            if start + last_n <= _HISTORY_CAPACITY:
+                y = self._mem_buf[start:start + last_n]
+            else:
+                y = np.concatenate((self._mem_buf[start:], self._mem_buf[:start + last_n - _HISTORY_CAPACITY]))
             
-            # 线性回归
-            coeffs = np.polyfit(x, y, 1)
+            # 线性回归（x = 0..n-1 的闭式解）
+            n = last_n
+            sum_x = n * (n - 1) / 2
+            sum_xx = (n - 1) * n * (2 * n - 1) / 6
+            sum_y = float(y.sum(dtype=np.float64))
+            sum_xy = float(np.dot(self._x[:n], y))
+            slope = (n * sum_xy - sum_x * sum_y) / (n * sum_xx - sum_x * sum_x)
+            intercept = (sum_y - slope * sum_x) / n
             
             return {
-                "trend_slope": coeffs[0],
-                "trend_intercept": coeffs[1],
-                "average_memory": np.mean(memory_values),
-                "max_memory": np.max(memory_values),
-                "min_memory": np.min(memory_values),
+                "trend_slope": slope,
+                "trend_intercept": intercept,
+                "average_memory": sum_y / n,
+                "max_memory": float(y.max()),
+                "min_memory": float(y.min()),
             }
 
 
 class ResourceMonitor:
     """资源监控器"""
     
-    def __init__(self):
+    def __init__(self, cache_ttl: float = 1.0):
         self.process = psutil.Process(os.getpid())
         self.start_time = time.time()
-        
+        self._cache = TTLCache(cache_ttl)
+        # 首次调用仅建立 CPU 采样基线
+        psutil.cpu_percent(interval=None)
+    
     def get_system_info(self) -> Dict[str, Any]:
         """获取系统信息"""
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage("/")
+        cpu_percent = psutil.cpu_percent(interval=None)
+        memory = self._cache.get("virtual_memory", psutil.virtual_memory)
+        disk = self._cache.get("disk_usage", lambda: psutil.disk_usage("/"))
         
         return {
             "cpu_percent": cpu_percent,
@@ -144,7 +170,9 @@ class ResourceMonitor:
             "cpu_user_seconds": cpu_times.user,
             "cpu_system_seconds": cpu_times.system,
             "threads": self.process.num_threads(),
-            "open_files": len(self.process.open_files()),
+            "open_files": self._cache.get(
+                "open_files", lambda: len(self.process.open_files()), OPEN_FILES_TTL
+            ),
         }
 
 
@@ -174,7 +202,7 @@ class MemoryLimiter:
         
         finally:
             self.memory_manager.cleanup_large_objects()
-            end_memory = self.memory_manager.get_memory_usage()
+            end_memory = self.memory_manager.get_memory_usage(fresh=True)
             
             # 检查内存使用
             if end_memory["rss_mb"] > self.max_memory_mb:
@@ -193,7 +221,7 @@ class MemoryLimiter:
             self.memory_manager.cleanup_large_objects()
             
             # 重新检查
-            new_memory = self.memory_manager.get_memory_usage()
+            new_memory = self.memory_manager.get_memory_usage(fresh=True)
             memory_reduction = current_memory["rss_mb"] - new_memory["rss_mb"]
             
             if memory_reduction > 0:
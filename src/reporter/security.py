@@ -9,7 +9,9 @@
 """
 
 import os
+import stat
 from pathlib import Path
+from typing import Optional
 
 
 # 允许的文件扩展名
@@ -18,6 +20,48 @@ ALLOWED_EXTENSIONS = {".csv", ".parquet"}
 # 默认文件大小限制 (1GB)
 MAX_FILE_SIZE = 1024 * 1024 * 1024
 
+# 文件名中需要移除的字符：路径分隔符、保留字符及 C0/C1 控制字符
+_UNSAFE_FILENAME_CHARS = dict.fromkeys(
+    [*range(0x00, 0x20), *range(0x7F, 0xA0), *map(ord, '<>:"/\\|?*')]
+)
+
+
+def _resolved_base_prefix(base_directory: str) -> str:
+    """解析基础目录并返回带结尾分隔符的路径前缀
+
+    不做缓存：相对路径依赖当前工作目录，符号链接目录也可能被重新指向，
+    每次校验都重新解析。
+    """
+    base_str = os.path.realpath(base_directory)
+    return base_str if base_str.endswith(os.sep) else base_str + os.sep
+
+
+def _stat_within(file_path: str, base_directory: str) -> Optional[os.stat_result]:
+    """
+    解析 file_path 并确认其为基础目录内的普通文件
+
+    Returns:
+        Optional[os.stat_result]: 安全时返回目标文件的 stat 结果，否则返回 None
+    """
+    try:
+        # 规范化路径，解析所有 .. 和 .
+        joined_path = os.path.join(base_directory, file_path)
+        # 解析前先检查原始路径，符号链接一律拒绝（解析后就无法再识别）
+        if stat.S_ISLNK(os.lstat(joined_path).st_mode):
+            return None
+
+        base_prefix = _resolved_base_prefix(base_directory)
+        target_path = os.path.realpath(joined_path)
+
+        # 检查目标路径是否在基础目录内（带分隔符比较，避免 /safe 匹配 /safe_evil）
+        if not target_path.startswith(base_prefix):
+            return None
+        st = os.stat(target_path)
+    except (ValueError, OSError):
+        return None
+
+    return st if stat.S_ISREG(st.st_mode) else None
+
 
 def validate_path(file_path: str, base_directory: str) -> bool:
     """
@@ -30,16 +74,7 @@ def validate_path(file_path: str, base_directory: str) -> bool:
     Returns:
         bool: 路径是否安全
     """
-    try:
-        # 规范化路径，解析所有 .. 和 .
-        base_path = Path(base_directory).resolve()
-        target_path = Path(base_directory) / file_path
-        target_path = target_path.resolve()
-
-        # 检查目标路径是否在基础目录内
-        return target_path.is_file() and str(target_path).startswith(str(base_path))
-    except (ValueError, OSError):
-        return False
+    return _stat_within(file_path, base_directory) is not None
 
 
 def sanitize_filename(filename: str) -> str:
@@ -52,10 +87,8 @@ def sanitize_filename(filename: str) -> str:
     Returns:
         str: 清理后的安全文件名
     """
-    import re
-
     # 移除路径分隔符和特殊字符
-    safe_chars = re.sub(r'[<>:"/\\|?*\x00-\x1f\x7f-\x9f]', "", filename)
+    safe_chars = filename.translate(_UNSAFE_FILENAME_CHARS)
 
     # 移除前导和尾随的点和空格
     safe_chars = safe_chars.strip(". ")
@@ -83,11 +116,12 @@ def is_allowed_file_type(filename: str) -> bool:
     Returns:
         bool: 文件类型是否被允许
     """
-    if not filename:
+    # 直接查找最后一个点，无需构造 Path；与 Path.suffix 一致，".csv" 这类隐藏文件名没有扩展名
+    i = filename.rfind(".")
+    if i <= 0 or filename[i - 1] in "/\\":
         return False
 
-    file_path = Path(filename)
-    return file_path.suffix.lower() in ALLOWED_EXTENSIONS
+    return filename[i:].lower() in ALLOWED_EXTENSIONS
 
 
 def check_file_size(file_path: str, max_size: int = MAX_FILE_SIZE) -> bool:
@@ -102,14 +136,34 @@ def check_file_size(file_path: str, max_size: int = MAX_FILE_SIZE) -> bool:
         bool: 文件大小是否符合要求
     """
     try:
-        file_path_obj = Path(file_path)
-        if not file_path_obj.exists() or not file_path_obj.is_file():
-            return False
-
-        return file_path_obj.stat().st_size <= max_size
+        st = os.stat(file_path)
     except (OSError, ValueError):
         return False
 
+    return stat.S_ISREG(st.st_mode) and st.st_size <= max_size
+
+
+def check_file_size_entry(entry: os.DirEntry, max_size: int = MAX_FILE_SIZE) -> bool:
+    """
+    检查目录项对应文件的大小是否在限制内
+
+    供遍历目录（os.scandir）的调用方使用，复用 DirEntry 缓存的 stat 结果，
+    不再对每个文件单独发起 stat 系统调用。符号链接不跟随，视为不合法。
+
+    Args:
+        entry: os.scandir 返回的目录项
+        max_size: 最大文件大小（字节）
+
+    Returns:
+        bool: 文件大小是否符合要求
+    """
+    try:
+        st = entry.stat(follow_symlinks=False)
+    except OSError:
+        return False
+
+    return stat.S_ISREG(st.st_mode) and st.st_size <= max_size
+
 
 def get_safe_file_path(filename: str, base_directory: str) -> str:
     """
@@ -144,12 +198,12 @@ def validate_file_operation(filename: str, base_directory: str) -> tuple[bool, s
     if not is_allowed_file_type(filename):
         return False, f"不支持的文件类型，仅支持: {', '.join(ALLOWED_EXTENSIONS)}"
 
-    safe_path = get_safe_file_path(filename, base_directory)
-
-    if not validate_path(filename, base_directory):
+    # 路径校验时已取得目标文件的 stat 结果，直接复用检查大小
+    st = _stat_within(filename, base_directory)
+    if st is None:
         return False, "文件路径不安全"
 
-    if Path(safe_path).exists() and not check_file_size(safe_path):
+    if st.st_size > MAX_FILE_SIZE:
         return False, f"文件大小超过限制 ({MAX_FILE_SIZE // 1024 // 1024}MB)"
 
     return True, ""
@@ -1,5 +1,11 @@
+import asyncio
+import base64
+import gc
+import os
+import time
 import polars as pl
-from typing import Dict, Any, List
+import polars.selectors as cs
+from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
 import logging
 
@@ -33,6 +39,68 @@ class FileManager:
 
 logger = logging.getLogger(__name__)
 
+# 分块处理时两次进度更新之间的最小间隔（秒）
+_PROGRESS_UPDATE_INTERVAL = 0.25
+
+
+class _ProgressThrottle:
+    """限制单个任务的进度更新频率，避免逐块更新带来大量等待"""
+    
+    def __init__(self, task_id: str, interval: float = _PROGRESS_UPDATE_INTERVAL):
+        self.task_id = task_id
+        self.interval = interval
+        self._last_update = float("-inf")
+    
+    async def update(self, progress: float, current_step: str = "", force: bool = False):
+        """距上次更新超过间隔或 force 为 True 时才转发到任务管理器"""
+        now = time.monotonic()
+        if not force and now - self._last_update < self.interval:
+            return
+        self._last_update = now
+        await task_manager.update_progress(self.task_id, progress, current_step)
+
+
+def _task_row_count(task_info: TaskInfo, df: pl.DataFrame) -> int:
+    """返回任务数据的行数，首次获取后缓存在任务信息中"""
+    if task_info.n_rows is None:
+        task_info.n_rows = df.height
+    return task_info.n_rows
+
+
+def _numeric_columns(schema: pl.Schema) -> List[str]:
+    """从 schema 中取出数值列（直接遍历 schema，不逐列取 Series；覆盖所有整数/浮点/Decimal 类型）"""
+    return [col for col, dtype in schema.items() if dtype.is_numeric()]
+
+
+def _correlation_payload(corr_matrix: Optional[pl.DataFrame]) -> Dict[str, Any]:
+    """将相关系数矩阵编码为 base64 形式的 Arrow IPC 流
+    
+    列式二进制编码不会为每个单元格创建 Python float；base64 保证结果仍可
+    JSON 序列化。读取方用 pl.read_ipc_stream(base64.b64decode(...)) 还原。
+    """
+    if not isinstance(corr_matrix, pl.DataFrame):
+        return {}
+    ipc_bytes = corr_matrix.write_ipc_stream(None).getvalue()
+    return {
+        "columns": corr_matrix.columns,
+        "ipc_stream_b64": base64.b64encode(ipc_bytes).decode("ascii"),
+    }
+
+
+def _sample_numeric(df: Union[pl.DataFrame, pl.LazyFrame], sample_size: int,
+                    total_rows: Optional[int] = None) -> pl.DataFrame:
+    """先筛选数值列再随机采样，在同一个延迟查询中完成，不物化非数值列的副本
+    
+    数值列统一转为 Float32：相关系数对精度要求不高，内存带宽减半。
+    """
+    if total_rows is None:
+        total_rows = len(df)
+    lf = df.lazy().select(cs.numeric().cast(pl.Float32))
+    if total_rows > sample_size:
+        lf = lf.filter(pl.int_range(pl.len()).shuffle(seed=42) < sample_size)
+    return lf.collect(engine="streaming")
+
+
 class AnalysisTaskProcessor:
     """分析任务处理器
     
@@ -55,71 +123,28 @@ class AnalysisTaskProcessor:
         task_manager.register_handler("time_series", self.handle_time_series)
     
     async def handle_full_analysis(self, task_info: TaskInfo, 
-                                 df: pl.DataFrame, 
+                                 df: Optional[pl.DataFrame] = None, 
+                                 file_path: Optional[str] = None,
                                  **kwargs) -> Dict[str, Any]:
-        """处理完整数据分析任务"""
+        """处理完整数据分析任务
+        
+        传入 df 时在已加载的数据框上分块；只传入 file_path 时直接用原生批量
+        读取器逐批分析文件，不将整个文件载入内存。
+        """
         try:
             logger.info(f"开始完整分析任务: {task_info.task_id}")
             
-            # 1. 数据预处理和分块
-            await task_manager.update_progress(
-                task_info.task_id, 5, "正在准备数据分块...", 1
-            )
-            
             time_column = kwargs.get("time_column")
-            chunks = self.chunk_processor.create_adaptive_chunks(
-                df, time_column=time_column
-            )
-            
-            await task_manager.update_progress(
-                task_info.task_id, 15, f"数据分块完成，共{len(chunks)}个块", 2
-            )
-            
-            # 2. 基础统计分析
-            stats_results = await self._process_chunks_parallel(
-                df, chunks, "basic_stats", task_info.task_id, 25, 45
-            )
-            merged_stats = self.chunk_processor.merge_chunk_results(stats_results, "stats")
-            
-            await task_manager.update_progress(
-                task_info.task_id, 50, "基础统计完成，开始相关性分析...", 3
-            )
-            
-            # 3. 相关性分析（使用采样数据以提高性能）
-            correlation_result = await self._analyze_correlation(
-                df, task_info.task_id, 50, 70
-            )
-            
-            await task_manager.update_progress(
-                task_info.task_id, 75, "相关性分析完成，开始时间序列分析...", 4
-            )
-            
-            # 4. 时间序列分析
-            time_series_result = {}
-            if time_column and time_column in df.columns:
-                time_series_results = await self._process_chunks_parallel(
-                    df, chunks, "time_series", task_info.task_id, 75, 90,
-                    time_column=time_column
+            if df is not None:
+                final_result = await self._full_analysis_from_frame(
+                    task_info, df, time_column
                 )
-                time_series_result = self.chunk_processor.merge_chunk_results(
-                    time_series_results, "time_series"
+            elif file_path:
+                final_result = await self._full_analysis_from_file(
+                    task_info, file_path, time_column
                 )
-            
-            await task_manager.update_progress(
-                task_info.task_id, 90, "分析完成，正在保存结果...", 5
-            )
-            
-            # 5. 合并和保存结果
-            final_result = {
-                "basic_stats": merged_stats,
-                "correlation": correlation_result,
-                "time_series": time_series_result,
-                "metadata": {
-                    "total_chunks": len(chunks),
-                    "processing_time": datetime.now().isoformat(),
-                    "data_shape": {"rows": len(df), "columns": len(df.columns)}
-                }
-            }
+            else:
+                raise ValueError("未提供数据框或文件路径")
             
             # 保存结果
             self.file_manager.save_analysis_result(
@@ -147,6 +172,171 @@ class AnalysisTaskProcessor:
             except AttributeError:
                 pass
     
+    async def _full_analysis_from_frame(self, task_info: TaskInfo, 
+                                        df: pl.DataFrame,
+                                        time_column: Optional[str]) -> Dict[str, Any]:
+        """在已加载的数据框上执行完整分析"""
+        task_id = task_info.task_id
+        n_rows = _task_row_count(task_info, df)
+        
+        # 1. 数据预处理和分块
+        await task_manager.update_progress(
+            task_id, 5, "正在准备数据分块...", 1
+        )
+        
+        chunks = self.chunk_processor.create_adaptive_chunks(
+            df, time_column=time_column
+        )
+        
+        await task_manager.update_progress(
+            task_id, 15, f"数据分块完成，共{len(chunks)}个块", 2
+        )
+        
+        # 2. 基础统计分析：整帧单次查询，Polars 内部已并行，无需分块再合并
+        merged_stats = await asyncio.to_thread(
+            self._analyze_chunk, df, "basic_stats"
+        )
+        
+        await task_manager.update_progress(
+            task_id, 50, "基础统计完成，开始相关性分析...", 3
+        )
+        
+        # 3. 相关性分析（使用采样数据以提高性能）
+        correlation_result = await self._analyze_correlation(
+            df, task_id, 50, 70, total_rows=n_rows
+        )
+        
+        await task_manager.update_progress(
+            task_id, 75, "相关性分析完成，开始时间序列分析...", 4
+        )
+        
+        # 4. 时间序列分析
+        time_series_result = {}
+        if time_column and time_column in df.columns:
+            time_series_results = await self._process_chunks_parallel(
+                df, chunks, "time_series", task_id, 75, 90,
+                time_column=time_column
+            )
+            time_series_result = self.chunk_processor.merge_chunk_results(
+                time_series_results, "time_series"
+            )
+        
+        await task_manager.update_progress(
+            task_id, 90, "分析完成，正在保存结果...", 5
+        )
+        
+        # 5. 合并结果
+        return {
+            "basic_stats": merged_stats,
+            "correlation": correlation_result,
+            "time_series": time_series_result,
+            "metadata": {
+                "total_chunks": len(chunks),
+                "processing_time": datetime.now().isoformat(),
+                "data_shape": {"rows": n_rows, "columns": df.width}
+            }
+        }
+    
+    async def _full_analysis_from_file(self, task_info: TaskInfo, 
+                                       file_path: str,
+                                       time_column: Optional[str]) -> Dict[str, Any]:
+        """基于文件扫描执行完整分析，不将整个文件载入内存
+        
+        基础统计与相关性在延迟查询上流式计算；时间序列逐批读取分析。
+        """
+        task_id = task_info.task_id
+        
+        # 1. 扫描文件结构和行数（不读取数据）
+        await task_manager.update_progress(
+            task_id, 5, "正在扫描数据文件...", 1
+        )
+        
+        lf = self.chunk_processor.scan_file(file_path)
+        schema = lf.collect_schema()
+        total_rows = task_info.n_rows
+        if total_rows is None:
+            total_rows = lf.select(pl.len()).collect(engine="streaming").item()
+            task_info.n_rows = total_rows
+        with_time_series = bool(time_column) and time_column in schema
+        numeric_columns = _numeric_columns(schema)
+        value_column = next(iter(schema), "")
+        
+        await task_manager.update_progress(
+            task_id, 15, f"文件扫描完成，共{total_rows}行", 2
+        )
+        
+        # 2. 基础统计：在文件扫描上执行一次流式查询，与整帧路径结果一致
+        merged_stats = await asyncio.to_thread(
+            calculate_descriptive_stats, lf, numeric_columns
+        )
+        
+        # 时间序列需要分块语义，仍逐批读取分析
+        time_series_results = []
+        rows_done = 0
+        total_batches = 0
+        if with_time_series:
+            await task_manager.update_progress(
+                task_id, 30, "开始分批时间序列分析..."
+            )
+            progress = _ProgressThrottle(task_id)
+            # 读取批次与分析都是阻塞调用，放到线程中执行，不占用事件循环
+            batches = self.chunk_processor.iter_file_batches(file_path)
+            while (batch := await asyncio.to_thread(next, batches, None)) is not None:
+                time_series_results.append(
+                    await asyncio.to_thread(
+                        self._analyze_chunk, batch, "time_series",
+                        time_column=time_column, value_column=value_column
+                    )
+                )
+                rows_done += batch.height
+                total_batches += 1
+                del batch
+                gc.collect(0)
+                
+                await progress.update(
+                    30 + 15 * rows_done / max(total_rows, 1),
+                    f"处理数据批次 {total_batches}"
+                )
+            await progress.update(
+                45, f"时间序列分批处理完成，共{total_batches}批", force=True
+            )
+        
+        await task_manager.update_progress(
+            task_id, 50, "基础统计完成，开始相关性分析...", 3
+        )
+        
+        # 3. 相关性分析（采样在延迟查询中完成）
+        correlation_result = await self._analyze_correlation(
+            lf, task_id, 50, 70, total_rows=total_rows
+        )
+        
+        await task_manager.update_progress(
+            task_id, 75, "相关性分析完成，合并时间序列结果...", 4
+        )
+        
+        # 4. 时间序列分析（已在分批阶段计算）
+        time_series_result = {}
+        if with_time_series:
+            time_series_result = self.chunk_processor.merge_chunk_results(
+                time_series_results, "time_series"
+            )
+        
+        await task_manager.update_progress(
+            task_id, 90, "分析完成，正在保存结果...", 5
+        )
+        
+        # 5. 合并结果
+        return {
+            "basic_stats": merged_stats,
+            "correlation": correlation_result,
+            "time_series": time_series_result,
+            "metadata": {
+                "total_chunks": total_batches,
+                "processing_time": datetime.now().isoformat(),
+                "data_shape": {"rows": total_rows, "columns": len(schema)}
+            }
+        }
+    
     async def handle_basic_stats(self, task_info: TaskInfo, 
                                df: pl.DataFrame, 
                                **kwargs) -> Dict[str, Any]:
@@ -155,8 +345,7 @@ class AnalysisTaskProcessor:
             logger.info(f"开始基础统计分析: {task_info.task_id}")
             
             # 获取数值列
-            numeric_columns = [col for col in df.columns 
-                             if df[col].dtype in [pl.Float32, pl.Float64, pl.Int32, pl.Int64]]
+            numeric_columns = _numeric_columns(df.schema)
             
             if not numeric_columns:
                 return {"error": "没有找到数值列"}
@@ -182,14 +371,13 @@ class AnalysisTaskProcessor:
             logger.info(f"开始相关性分析: {task_info.task_id}")
             
             # 对大数据集进行采样
-            if len(df) > 50000:
-                df_sample = df.sample(50000, seed=42)
+            n_rows = _task_row_count(task_info, df)
+            if n_rows > 50000:
                 logger.info("使用采样数据进行相关性分析")
-            else:
-                df_sample = df
+            df_sample = _sample_numeric(df, 50000, n_rows)
             
             corr_matrix = calculate_correlation_matrix(df_sample)
-            correlation_result = {"correlation_matrix": corr_matrix.to_dict() if hasattr(corr_matrix, 'to_dict') else {}}
+            correlation_result = {"correlation_matrix": _correlation_payload(corr_matrix)}
             
             await task_manager.update_progress(
                 task_info.task_id, 100, "相关性分析完成"
@@ -233,67 +421,101 @@ class AnalysisTaskProcessor:
                                      start_progress: float,
                                      end_progress: float,
                                      **analysis_kwargs) -> List[Dict[str, Any]]:
-        """并行处理数据块"""
-        results = []
+        """并行处理数据块
+        
+        各块的分析在线程池中执行（Polars 计算会释放 GIL），并发数不超过 CPU 核心数；
+        每完成一个块更新一次进度，结果顺序与 chunks 一致。
+        """
         total_chunks = len(chunks)
+        if total_chunks == 0:
+            return []
+        
         progress_range = end_progress - start_progress
+        semaphore = asyncio.Semaphore(os.cpu_count() or 1)
         
-        # 处理每个数据块
-        for i, chunk_info in enumerate(chunks):
-            try:
-                # 获取数据块
-                chunk_data = self.chunk_processor.get_chunk_data(df, chunk_info)
-                
-                # 执行分析
-                if analysis_type == "basic_stats":
-                    result = calculate_descriptive_stats(chunk_data, chunk_data.columns)
-                elif analysis_type == "correlation":
-                    corr_matrix = calculate_correlation_matrix(chunk_data)
-                    result = {"correlation_matrix": corr_matrix.to_dict() if hasattr(corr_matrix, 'to_dict') else {}}
-                elif analysis_type == "time_series":
-                    time_column = analysis_kwargs.get("time_column")
-                    if not time_column:
-                        result = {"error": "未指定时间列"}
-                    else:
-                        value_column = analysis_kwargs.get("value_column", chunk_data.columns[0] if chunk_data.columns else "")
-                        result = analyze_time_series(chunk_data, time_column, value_column)
-                else:
-                    raise ValueError(f"不支持的分析类型: {analysis_type}")
-                
-                results.append(result)
-                
-                # 更新进度
-                progress = start_progress + (i + 1) / total_chunks * progress_range
-                await task_manager.update_progress(
-                    task_id, progress, f"处理数据块 {i+1}/{total_chunks}"
-                )
-                
-                # 内存管理
-                if i % 5 == 0:  # 每处理5个块清理一次内存
-                    try:
-                        self.memory_manager.force_garbage_collection()
-                    except AttributeError:
-                        pass
-                
-            except Exception as e:
-                logger.error(f"处理数据块 {i} 失败: {e}")
-                results.append({"error": str(e)})
+        # 与块无关的元数据只在整个数据集上解析一次
+        numeric_columns = _numeric_columns(df.schema)
+        if analysis_type == "time_series":
+            analysis_kwargs.setdefault("value_column", df.columns[0] if df.columns else "")
+        results: List[Dict[str, Any]] = [{} for _ in range(total_chunks)]
+        
+        async def run_chunk(i: int, chunk_info: ChunkInfo) -> None:
+            async with semaphore:
+                chunk_data = None
+                try:
+                    # 获取数据块并执行分析
+                    chunk_data = self.chunk_processor.get_chunk_data(df, chunk_info)
+                    results[i] = await asyncio.to_thread(
+                        self._analyze_chunk, chunk_data, analysis_type,
+                        numeric_columns, **analysis_kwargs
+                    )
+                except Exception as e:
+                    logger.error(f"处理数据块 {i} 失败: {e}")
+                    results[i] = {"error": str(e)}
+                finally:
+                    # 块用完即释放，只回收第 0 代（开销与新分配对象数成正比）
+                    del chunk_data
+                    gc.collect(0)
         
+        completed = 0
+        progress = _ProgressThrottle(task_id)
+        for finished in asyncio.as_completed(
+            [run_chunk(i, chunk_info) for i, chunk_info in enumerate(chunks)]
+        ):
+            await finished
+            completed += 1
+            
+            # 更新进度（限频，最后一个块总会更新）
+            await progress.update(
+                start_progress + completed / total_chunks * progress_range,
+                f"处理数据块 {completed}/{total_chunks}",
+                force=completed == total_chunks
+            )
+        
+        # 完整回收由 handle_full_analysis 的 finally 统一执行一次
         return results
     
-    async def _analyze_correlation(self, df: pl.DataFrame, 
+    def _analyze_chunk(self, chunk_data: pl.DataFrame, 
+                       analysis_type: str,
+                       numeric_columns: Optional[List[str]] = None,
+                       **analysis_kwargs) -> Dict[str, Any]:
+        """对单个数据块执行指定类型的分析
+        
+        numeric_columns 由调用方在整个数据集上计算一次后传入，各块不再重复检查类型。
+        """
+        if analysis_type == "basic_stats":
+            if numeric_columns is None:
+                numeric_columns = _numeric_columns(chunk_data.schema)
+            return calculate_descriptive_stats(chunk_data, numeric_columns)
+        elif analysis_type == "correlation":
+            corr_matrix = calculate_correlation_matrix(chunk_data)
+            return {"correlation_matrix": _correlation_payload(corr_matrix)}
+        elif analysis_type == "time_series":
+            time_column = analysis_kwargs.get("time_column")
+            if not time_column:
+                return {"error": "未指定时间列"}
+            value_column = analysis_kwargs.get("value_column", chunk_data.columns[0] if chunk_data.columns else "")
+            return analyze_time_series(chunk_data, time_column, value_column)
+        else:
+            raise ValueError(f"不支持的分析类型: {analysis_type}")
+    
+    async def _analyze_correlation(self, df: Union[pl.DataFrame, pl.LazyFrame], 
                                  task_id: str,
                                  start_progress: float,
-                                 end_progress: float) -> Dict[str, Any]:
+                                 end_progress: float,
+                                 total_rows: Optional[int] = None) -> Dict[str, Any]:
         """分析相关性（使用采样以提高性能）"""
         try:
+            if total_rows is None:
+                total_rows = len(df)
+            
             # 对于大数据集，使用采样来计算相关性
-            if len(df) > 100000:
-                sample_size = min(50000, len(df))
-                df_sample = df.sample(sample_size, seed=42)
+            if total_rows > 100000:
+                sample_size = 50000
                 logger.info(f"使用采样数据计算相关性，样本大小: {sample_size}")
             else:
-                df_sample = df
+                sample_size = total_rows
+            df_sample = _sample_numeric(df, sample_size, total_rows)
             
             await task_manager.update_progress(
                 task_id, (start_progress + end_progress) / 2, 
@@ -301,7 +523,7 @@ class AnalysisTaskProcessor:
             )
             
             corr_matrix = calculate_correlation_matrix(df_sample)
-            result = {"correlation_matrix": corr_matrix.to_dict() if hasattr(corr_matrix, 'to_dict') else {}}
+            result = {"correlation_matrix": _correlation_payload(corr_matrix)}
             
             return result
             
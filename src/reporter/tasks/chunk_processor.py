@@ -1,12 +1,16 @@
 import polars as pl
 from typing import List, Dict, Any, Iterator, Optional, Tuple
 import math
+from pathlib import Path
 from dataclasses import dataclass
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 从文件分批读取时每批的目标行数
+FILE_BATCH_ROWS = 100000
+
 @dataclass
 class ChunkInfo:
     """数据块信息"""
@@ -327,6 +331,49 @@ class DataChunkProcessor:
             chunk_data = self.get_chunk_data(df, chunk_info, with_overlap)
             yield chunk_info, chunk_data
     
+    def scan_file(self, file_path: str) -> pl.LazyFrame:
+        """延迟扫描数据文件（CSV/Parquet），不读取数据行
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            延迟扫描的数据框
+        """
+        suffix = Path(file_path).suffix.lower()
+        if suffix == ".csv":
+            return pl.scan_csv(file_path)
+        if suffix == ".parquet":
+            return pl.scan_parquet(file_path)
+        raise ValueError(f"不支持的文件格式: {suffix}")
+    
+    def iter_file_batches(self, file_path: str, 
+                          batch_rows: int = FILE_BATCH_ROWS) -> Iterator[pl.DataFrame]:
+        """使用原生批量读取器逐批读取数据文件
+        
+        与先整体加载再切片不同，峰值内存只与批大小相关。
+        
+        Args:
+            file_path: 文件路径
+            batch_rows: 每批目标行数（CSV 读取器可能切分得更细）
+            
+        Yields:
+            每一批数据
+        """
+        suffix = Path(file_path).suffix.lower()
+        if suffix == ".csv":
+            reader = pl.read_csv_batched(file_path, batch_size=batch_rows)
+            while batches := reader.next_batches(4):
+                yield from batches
+        elif suffix == ".parquet":
+            import pyarrow.parquet as pq
+            
+            parquet_file = pq.ParquetFile(file_path)
+            for record_batch in parquet_file.iter_batches(batch_size=batch_rows):
+                yield pl.from_arrow(record_batch)
+        else:
+            raise ValueError(f"不支持的文件格式: {suffix}")
+    
     def merge_chunk_results(self, chunk_results: List[Dict[str, Any]], 
                           result_type: str = "stats") -> Dict[str, Any]:
         """合并多个块的处理结果
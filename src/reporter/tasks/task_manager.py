@@ -29,6 +29,7 @@ class TaskInfo:
     error_message: Optional[str] = None
     result_path: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
+    n_rows: Optional[int] = None  # 数据行数，首次获取后缓存，避免重复计算
     
     def __post_init__(self):
         if self.metadata is None:
@@ -59,6 +60,8 @@ class TaskManager:
         self.max_concurrent_tasks = max_concurrent_tasks
         self._task_handlers: Dict[str, Callable] = {}
         self._lock = asyncio.Lock()
+        # 任务结束（完成/失败/取消）时触发的事件，供等待方直接 await
+        self._done_events: Dict[str, asyncio.Event] = {}
         
     def register_handler(self, task_type: str, handler: Callable):
         """注册任务处理器
@@ -90,6 +93,7 @@ class TaskManager:
         
         async with self._lock:
             self.tasks[task_id] = task_info
+            self._done_events[task_id] = asyncio.Event()
         
         # 尝试立即执行任务
         await self._try_execute_pending_tasks()
@@ -100,6 +104,32 @@ class TaskManager:
         """获取任务信息"""
         return self.tasks.get(task_id)
     
+    async def wait_for(self, task_id: str, timeout: Optional[float] = None) -> Optional[TaskInfo]:
+        """等待任务结束
+        
+        Args:
+            task_id: 任务ID
+            timeout: 超时时间（秒），None表示一直等待
+            
+        Returns:
+            任务信息，任务不存在时返回None
+            
+        Raises:
+            asyncio.TimeoutError: 超时仍未结束
+        """
+        event = self._done_events.get(task_id)
+        if event is None:
+            return self.tasks.get(task_id)
+        
+        await asyncio.wait_for(event.wait(), timeout)
+        return self.tasks.get(task_id)
+    
+    def _mark_done(self, task_id: str):
+        """通知等待方任务已结束"""
+        event = self._done_events.get(task_id)
+        if event is not None:
+            event.set()
+    
     async def get_task_status(self, task_id: str) -> Optional[TaskStatus]:
         """获取任务状态"""
         task_info = self.tasks.get(task_id)
@@ -125,6 +155,7 @@ class TaskManager:
             
             task_info.status = TaskStatus.CANCELLED
             task_info.completed_at = datetime.now()
+            self._mark_done(task_id)
             
         return True
     
@@ -174,6 +205,7 @@ class TaskManager:
             task_info.status = TaskStatus.FAILED
             task_info.error_message = f"未找到任务类型 '{task_info.task_type}' 的处理器"
             task_info.completed_at = datetime.now()
+            self._mark_done(task_info.task_id)
             return
         
         # 创建异步任务
@@ -215,6 +247,7 @@ class TaskManager:
             # 清理运行中的任务记录
             if task_info.task_id in self.running_tasks:
                 del self.running_tasks[task_info.task_id]
+            self._mark_done(task_info.task_id)
             
             # 尝试执行下一个等待的任务
             await self._try_execute_pending_tasks()
@@ -260,6 +293,7 @@ class TaskManager:
             for task_info in tasks_to_remove:
                 if task_info.task_id in self.tasks:
                     del self.tasks[task_info.task_id]
+                self._done_events.pop(task_info.task_id, None)
 
 # 全局任务管理器实例
 task_manager = TaskManager()
\ No newline at end of file
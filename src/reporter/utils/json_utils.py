@@ -0,0 +1,68 @@
+"""JSON 序列化工具模块
+
+优先使用 orjson（可选依赖，安装 data-report[fast-json] 启用），
+未安装或遇到 orjson 不支持的类型时回退到标准库 json，输出格式保持一致。
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    if orjson is not None else 0
+)
+_ORJSON_INDENT_OPTIONS = (
+    _ORJSON_OPTIONS | orjson.OPT_INDENT_2
+    if orjson is not None else 0
+)
+
+
+class DateTimeEncoder(json.JSONEncoder):
+    """自定义JSON编码器，处理datetime对象"""
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def dumps(data: Any, indent: bool = False) -> bytes:
+    """序列化为 UTF-8 JSON 字节
+
+    Args:
+        data: 待序列化的数据
+        indent: 是否以两个空格缩进输出
+
+    Returns:
+        bytes: JSON 字节
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                data, option=_ORJSON_INDENT_OPTIONS if indent else _ORJSON_OPTIONS
+            )
+        except TypeError:
+            pass
+    if indent:
+        text = json.dumps(data, ensure_ascii=False, indent=2, cls=DateTimeEncoder)
+    else:
+        text = json.dumps(
+            data, ensure_ascii=False, separators=(",", ":"), cls=DateTimeEncoder
+        )
+    return text.encode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """解析 JSON 字符串或字节
+
+    Raises:
+        json.JSONDecodeError: 内容不是合法 JSON（orjson 的异常是其子类）
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,34 @@
+"""TTL 缓存工具模块
+
+健康检查与资源监控会被频繁轮询，psutil 的系统调用结果在短时间窗内复用即可。
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# open_files() 需逐个检查 /proc/self/fd 下的条目，结果缓存更长时间（秒）
+OPEN_FILES_TTL = 5.0
+
+
+class TTLCache:
+    """按时间窗缓存查询结果：同一 TTL 时间窗内复用，跨窗后重新查询"""
+
+    def __init__(self, ttl: float = 1.0):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+
+    def get(self, key: str, factory: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """返回 key 对应的缓存值，缓存缺失或过期时调用 factory 重新获取
+
+        Args:
+            key: 缓存键
+            factory: 获取新值的无参函数
+            ttl: 本条目的缓存时间（秒），默认使用实例的 ttl
+        """
+        bucket = time.monotonic() // (ttl or self.ttl)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == bucket:
+            return entry[1]
+        value = factory()
+        self._entries[key] = (bucket, value)
+        return value
@@ -0,0 +1,109 @@
+"""
+分析任务处理器单元测试
+"""
+
+import asyncio
+import base64
+import json
+from datetime import datetime
+
+import polars as pl
+import pytest
+
+from src.reporter.tasks import analysis_tasks
+from src.reporter.tasks.analysis_tasks import AnalysisTaskProcessor, _correlation_payload
+from src.reporter.tasks.task_manager import TaskInfo, TaskStatus
+
+
+def _task_info(task_id: str) -> TaskInfo:
+    return TaskInfo(task_id, "full_analysis", TaskStatus.RUNNING, datetime.now())
+
+
+@pytest.fixture
+def sample_csv(tmp_path):
+    """创建包含数值列、字符串列和缺失值的测试CSV文件"""
+    csv_path = tmp_path / "sample.csv"
+    pl.DataFrame(
+        {
+            "a": [float(i) for i in range(500)],
+            "b": [i % 7 if i % 11 else None for i in range(500)],
+            "label": [f"x{i % 3}" for i in range(500)],
+        }
+    ).write_csv(csv_path)
+    return csv_path
+
+
+class TestFullAnalysis:
+    """完整分析任务测试"""
+
+    def test_file_path_matches_dataframe(self, sample_csv):
+        """测试文件路径与数据框两种输入得到相同的基础统计"""
+        processor = AnalysisTaskProcessor()
+        df = pl.read_csv(sample_csv)
+
+        from_frame = asyncio.run(
+            processor.handle_full_analysis(_task_info("frame"), df=df)
+        )
+        from_file = asyncio.run(
+            processor.handle_full_analysis(_task_info("file"), file_path=str(sample_csv))
+        )
+
+        frame_stats = from_frame["basic_stats"]
+        file_stats = from_file["basic_stats"]
+        assert set(frame_stats) == {"a", "b"}
+        assert set(file_stats) == set(frame_stats)
+        for col, col_stats in frame_stats.items():
+            assert file_stats[col] == pytest.approx(col_stats)
+        assert file_stats["b"]["count"] == df["b"].count()
+        assert (
+            from_file["metadata"]["data_shape"] == from_frame["metadata"]["data_shape"]
+        )
+
+    def test_file_path_progress_is_monotonic(self, tmp_path, monkeypatch):
+        """测试文件路径分批时间序列分析的进度单调递增且阶段提示不重复"""
+        parquet_path = tmp_path / "series.parquet"
+        pl.DataFrame(
+            {
+                "date": pl.datetime_range(
+                    datetime(2023, 1, 1), datetime(2023, 1, 13, 11), "1h", eager=True
+                ),
+                "value": [float(i) for i in range(300)],
+            }
+        ).write_parquet(parquet_path)
+
+        updates = []
+
+        async def record(task_id, progress, current_step="", completed_steps=None):
+            updates.append((progress, current_step))
+
+        monkeypatch.setattr(analysis_tasks.task_manager, "update_progress", record)
+
+        processor = AnalysisTaskProcessor()
+        result = asyncio.run(
+            processor.handle_full_analysis(
+                _task_info("series"), file_path=str(parquet_path), time_column="date"
+            )
+        )
+
+        progress_values = [p for p, _ in updates]
+        assert progress_values == sorted(progress_values)
+        assert sum("基础统计完成" in step for _, step in updates) == 1
+        assert result["metadata"]["total_chunks"] >= 1
+
+
+class TestCorrelationPayload:
+    """相关系数矩阵编码测试"""
+
+    def test_round_trip_through_json(self):
+        """测试编码结果可 JSON 序列化并能还原为原矩阵"""
+        corr = pl.DataFrame({"a": [1.0, 0.5], "b": [0.5, 1.0]})
+
+        payload = json.loads(json.dumps(_correlation_payload(corr)))
+
+        assert payload["columns"] == ["a", "b"]
+        restored = pl.read_ipc_stream(base64.b64decode(payload["ipc_stream_b64"]))
+        assert restored.equals(corr)
+
+    def test_non_dataframe(self):
+        """测试非数据框输入返回空结果"""
+        assert _correlation_payload(None) == {}
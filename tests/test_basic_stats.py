@@ -4,9 +4,11 @@
 
 import pytest
 import polars as pl
+from src.reporter.data_loader import prepare_analysis_data
 from src.reporter.analysis.basic_stats import (
     calculate_descriptive_stats,
     analyze_missing_values,
+    build_missing_values_report,
     detect_outliers,
     calculate_correlation_matrix,
     get_data_summary,
@@ -90,6 +92,29 @@ class TestAnalyzeMissingValues:
 
         assert missing == {}
 
+    def test_report_from_prepared_data_covers_all_columns(self):
+        """测试由预处理结果生成的报告包含字符串列、常数列和全缺失列"""
+        df = pl.DataFrame(
+            {
+                "date": ["2023-01-01", "2023-01-02", "2023-01-03"],
+                "v": [1.0, None, 3.0],
+                "cat": ["a", None, "c"],
+                "k": [5, 5, 5],
+                "empty": pl.Series([None, None, None], dtype=pl.Float64),
+            }
+        )
+
+        data_info = prepare_analysis_data(df)
+        missing = build_missing_values_report(
+            {col: info["missing_count"] for col, info in data_info["missing_values"].items()},
+            data_info["sampled_rows"],
+        )
+
+        assert data_info["processed_df"].columns == ["date", "v"]
+        assert missing == analyze_missing_values(df)
+        assert missing["cat"]["null_count"] == 1
+        assert missing["empty"]["null_percentage"] == 100
+
 
 class TestDetectOutliers:
     """异常值检测测试"""
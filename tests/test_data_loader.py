@@ -2,14 +2,16 @@
 数据加载模块单元测试
 """
 
+import os
 import tempfile
 import pytest
 import polars as pl
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
 
 from src.reporter.data_loader import (
     load_data_file,
+    scan_data_file,
     detect_time_column,
     prepare_analysis_data,
 )
@@ -59,6 +61,24 @@ class TestLoadDataFile:
 
         Path(tmp.name).unlink()
 
+    def test_reload_unchanged_file_uses_cache(self):
+        """测试未修改的文件重复加载命中缓存，修改后重新读取"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = Path(tmpdir) / "cached.csv"
+            csv_path.write_text("date,value\n2023-01-01,10\n")
+
+            first = load_data_file(str(csv_path))
+            assert load_data_file(str(csv_path)) is first
+            assert load_data_file(str(Path(tmpdir) / "." / "cached.csv")) is first
+
+            csv_path.write_text("date,value\n2023-01-01,10\n2023-01-02,20\n")
+            stat = csv_path.stat()
+            os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+            reloaded = load_data_file(str(csv_path))
+            assert reloaded is not first
+            assert len(reloaded) == 2
+
     def test_nonexistent_file(self):
         """测试不存在的文件"""
         with pytest.raises(FileNotFoundError, match="文件不存在"):
@@ -87,6 +107,18 @@ class TestDetectTimeColumn:
         result = detect_time_column(df)
         assert result == "time_col"
 
+    def test_detect_by_date_type(self):
+        """测试通过 Date 数据类型检测"""
+        df = pl.DataFrame(
+            {
+                "day": [date(2023, 1, 1), date(2023, 1, 2)],
+                "value": [10, 20],
+            }
+        )
+
+        result = detect_time_column(df)
+        assert result == "day"
+
     def test_detect_by_tagtime_name(self):
         """测试检测tagTime列"""
         df = pl.DataFrame({"tagTime": ["2023-01-01", "2023-01-02"], "value": [10, 20]})
@@ -152,6 +184,9 @@ class TestPrepareAnalysisData:
         assert result["time_column"] is None
         assert result["numeric_columns"] == ["col1", "col2"]
         assert len(result["numeric_columns"]) == 2
+        assert result["processed_df"].columns == ["col1", "col2"]
+        assert result["total_columns"] == 3
+        assert "col3" in result["missing_values"]
 
     def test_missing_values_detection(self):
         """测试缺失值检测"""
@@ -164,6 +199,33 @@ class TestPrepareAnalysisData:
         assert result["missing_values"]["date"] == 1
         assert result["missing_values"]["value"] == 1
 
+    def test_constant_columns_excluded(self):
+        """测试常数列与全缺失列被排除"""
+        df = pl.DataFrame(
+            {
+                "constant": [5, 5, 5],
+                "varying": [1.0, 2.0, None],
+                "all_null": pl.Series([None, None, None], dtype=pl.Float64),
+            }
+        )
+
+        result = prepare_analysis_data(df)
+
+        assert result["numeric_columns"] == ["varying"]
+        assert result["constant_columns"] == ["constant"]
+
+    def test_large_dataset_sampling(self):
+        """测试大数据集等间隔采样并保持原始顺序"""
+        df = pl.DataFrame({"value": [float(i) for i in range(1000)]})
+
+        result = prepare_analysis_data(df, sample_size=100)
+        sampled = result["processed_df"]["value"]
+
+        assert result["total_rows"] == 1000
+        assert result["sampled_rows"] == 100
+        assert sampled.is_sorted()
+        assert sampled[-1] == 999.0
+
     def test_empty_dataframe_error(self):
         """测试空数据框错误"""
         df = pl.DataFrame()
@@ -198,6 +260,22 @@ class TestPrepareAnalysisData:
         assert result["total_rows"] == 2
         assert len(result["processed_df"]) == 2
 
+    def test_datetime_conversion_mixed_formats(self):
+        """测试多种时间格式混合的列可一次解析"""
+        df = pl.DataFrame(
+            {
+                "timestamp": [" 2023-01-01 10:00:00", "2023-01-02", "2023/01/03"],
+                "value": [100, 200, 150],
+            }
+        )
+
+        result = prepare_analysis_data(df)
+        parsed = result["processed_df"]["timestamp"]
+
+        assert result["time_column"] == "timestamp"
+        assert parsed.dtype == pl.Datetime
+        assert parsed.null_count() == 0
+
 
 @pytest.fixture
 def sample_csv_file():
@@ -235,3 +313,14 @@ class TestIntegration:
         assert "humidity" in analysis_data["numeric_columns"]
         assert analysis_data["total_rows"] == 3
         assert all(missing == 0 for missing in analysis_data["missing_values"].values())
+
+    def test_lazy_pipeline(self, sample_csv_file):
+        """测试延迟扫描结果可直接用于数据预处理"""
+        lf = scan_data_file(sample_csv_file)
+        assert isinstance(lf, pl.LazyFrame)
+
+        analysis_data = prepare_analysis_data(lf)
+
+        assert analysis_data["time_column"] == "date"
+        assert analysis_data["total_rows"] == 3
+        assert set(analysis_data["numeric_columns"]) == {"temperature", "humidity"}
@@ -0,0 +1,74 @@
+"""
+数据库模块单元测试
+"""
+
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+from src.reporter.database import AnalysisRecord, DatabaseManager, FileRecord
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+class TestDatabaseManagerLifecycle:
+    """数据库连接生命周期测试"""
+
+    def test_context_manager_closes_connection(self, tmp_path):
+        """测试 async with 退出时关闭共享连接"""
+
+        async def run():
+            async with DatabaseManager(tmp_path / "test.db") as db_manager:
+                await db_manager.init_database()
+                assert db_manager._conn is not None
+            return db_manager
+
+        db_manager = asyncio.run(run())
+        assert db_manager._conn is None
+
+    def test_init_script_terminates(self, tmp_path):
+        """测试数据库初始化脚本执行完毕后进程能够退出"""
+        result = subprocess.run(
+            [sys.executable, str(PROJECT_ROOT / "scripts" / "init_database.py"), "init"],
+            cwd=tmp_path,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+
+        assert result.returncode == 0, result.stderr
+        # 存储统计为异步接口，必须被等待后输出实际结果
+        assert "存储统计信息: {'uploads'" in result.stderr
+        assert "never awaited" not in result.stderr
+
+
+class TestStorageStats:
+    """基于数据库记录的存储统计测试"""
+
+    def test_file_stats_include_analysis_result_sizes(self, tmp_path):
+        """测试保存结果时记录的文件大小会汇总到存储统计中"""
+
+        async def run():
+            async with DatabaseManager(tmp_path / "test.db") as db_manager:
+                await db_manager.init_database()
+                file_id = await db_manager.add_file_record(FileRecord(
+                    filename="a.csv", original_filename="a.csv", file_hash="ab" * 32,
+                    file_size=10, file_type="csv", file_path="data/uploads/a.csv",
+                ))
+                for size in (100, 250):
+                    analysis_id = await db_manager.add_analysis_record(
+                        AnalysisRecord(file_id=file_id, analysis_result="{}")
+                    )
+                    await db_manager.update_analysis_result_path(
+                        analysis_id, f"analysis_{analysis_id}.json", size
+                    )
+                # 尚未写入结果文件的记录不计入统计
+                await db_manager.add_analysis_record(
+                    AnalysisRecord(file_id=file_id, analysis_result="{}")
+                )
+                return await db_manager.get_file_stats()
+
+        stats = asyncio.run(run())
+        assert stats['file_types'] == {'csv': {'count': 1, 'size_bytes': 10}}
+        assert stats['analysis_results'] == {'total_results': 2, 'total_size_bytes': 350}
@@ -0,0 +1,49 @@
+"""
+JSON 序列化工具单元测试
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from src.reporter.utils import json_utils
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    """分别在 orjson 可用与回退到标准库 json 两种情况下运行"""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(json_utils, "orjson", None)
+    return request.param
+
+
+class TestJsonUtils:
+    """dumps / loads 测试"""
+
+    def test_round_trip(self, backend):
+        """测试中文、非字符串键和 datetime 的序列化"""
+        data = {"名称": "数据", 1: [1.5, None], "time": datetime(2024, 1, 2, 3, 4, 5)}
+
+        decoded = json_utils.loads(json_utils.dumps(data))
+
+        assert decoded == {
+            "名称": "数据",
+            "1": [1.5, None],
+            "time": "2024-01-02T03:04:05",
+        }
+
+    def test_indent_output(self, backend):
+        """测试缩进输出为 UTF-8 且与标准库格式一致"""
+        data = {"a": [1, 2], "中文": "值"}
+
+        output = json_utils.dumps(data, indent=True)
+
+        assert output.decode("utf-8") == json.dumps(data, ensure_ascii=False, indent=2)
+
+    def test_invalid_json(self, backend):
+        """测试非法 JSON 抛出 JSONDecodeError"""
+        with pytest.raises(json.JSONDecodeError):
+            json_utils.loads("{invalid")
@@ -11,6 +11,7 @@ from src.reporter.security import (
     sanitize_filename,
     is_allowed_file_type,
     check_file_size,
+    check_file_size_entry,
     validate_file_operation,
 )
 
@@ -36,6 +37,44 @@ class TestValidatePath:
         with tempfile.TemporaryDirectory() as tmpdir:
             assert validate_path("nonexistent.csv", tmpdir) is False
 
+    def test_sibling_directory_with_same_prefix(self):
+        """测试同名前缀的兄弟目录不被视为在基础目录内"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            base_dir = Path(tmpdir) / "safe"
+            sibling_dir = Path(tmpdir) / "safe_evil"
+            base_dir.mkdir()
+            sibling_dir.mkdir()
+            (sibling_dir / "test.csv").write_text("test")
+
+            assert validate_path("../safe_evil/test.csv", str(base_dir)) is False
+
+    def test_symlink_rejected(self):
+        """测试指向基础目录内文件的符号链接同样被拒绝"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            test_file = Path(tmpdir) / "test.csv"
+            test_file.write_text("test")
+            (Path(tmpdir) / "link.csv").symlink_to(test_file)
+
+            assert validate_path("link.csv", tmpdir) is False
+
+    def test_repointed_symlink_base(self):
+        """测试基础目录为符号链接且被重新指向后按新目标校验"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            old_dir = Path(tmpdir, "old")
+            new_dir = Path(tmpdir, "new")
+            old_dir.mkdir()
+            new_dir.mkdir()
+            Path(old_dir, "data.csv").write_text("a\n1\n")
+            Path(new_dir, "data.csv").write_text("a\n1\n")
+            base = Path(tmpdir, "base")
+            base.symlink_to(old_dir)
+            assert validate_path(str(old_dir / "data.csv"), str(base)) is True
+
+            base.unlink()
+            base.symlink_to(new_dir)
+            assert validate_path(str(old_dir / "data.csv"), str(base)) is False
+            assert validate_path(str(new_dir / "data.csv"), str(base)) is True
+
 
 class TestSanitizeFilename:
     """文件名清理测试"""
@@ -86,6 +125,22 @@ class TestCheckFileSize:
         """测试不存在的文件"""
         assert check_file_size("/nonexistent/file.csv") is False
 
+    def test_dir_entry(self):
+        """测试基于目录项的大小检查"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            Path(tmpdir, "data.csv").write_text("a,b\n1,2\n")
+            Path(tmpdir, "subdir").mkdir()
+            os.symlink(Path(tmpdir, "data.csv"), Path(tmpdir, "link.csv"))
+
+            with os.scandir(tmpdir) as it:
+                results = {entry.name: check_file_size_entry(entry) for entry in it}
+
+            assert results == {"data.csv": True, "subdir": False, "link.csv": False}
+
+            with os.scandir(tmpdir) as it:
+                entry = next(e for e in it if e.name == "data.csv")
+                assert check_file_size_entry(entry, max_size=4) is False
+
 
 class TestValidateFileOperation:
     """文件操作综合验证测试"""